@@ -1,67 +1,89 @@
-import sys
+"""Structures used by the benchmarks, with plain struct.Struct equivalents as a baseline"""
 import struct
-import pyximport
+import time
 
-pyximport.install()
 import cypyserialize
 
-sys.path.append("..\\qpstools\\libs\\")
-import structObject as structobject
 
-
-class Point(structobject.structObject):
+class Point(cypyserialize.SerializableObject):
     "Basic point class"
-    _field_order = ['x', 'y']
-    x = structobject.ctype_double()
-    y = structobject.ctype_uint()
+    x = cypyserialize.double()
+    y = cypyserialize.uint()
 
 
-class Point3D(structobject.structObject):
-    "Basic point class"
-    _field_order = ['x', 'y', 'z']
-    x = structobject.ctype_double()
-    y = structobject.ctype_double()
-    z = structobject.ctype_double()
+class BoundingBox(cypyserialize.SerializableObject):
+    northwest = Point()
+    southeast = Point()
+    northsouth = Point()
 
 
-class BoundingBox(structobject.structObject):
-    _field_order = ['northwest', 'southeast', 'northsouth']
-    northwest = Point
-    southeast = Point
-    northsouth = Point
+class Extents(cypyserialize.SerializableObject):
+    count = cypyserialize.double()
+    extents = BoundingBox()
 
 
-class Extents(structobject.structObject):
-    _field_order = ['count', 'extents']
-    count = structobject.ctype_double()
-    extents = BoundingBox
+class GenericDatagram(cypyserialize.SerializableObject):
+    STX = cypyserialize.uchar(value=0x02)
+    timestamp = cypyserialize.uint()
+    body = cypyserialize.none()
+    ETX = cypyserialize.uchar(value=0x03)
 
 
-class cPoint(cypyserialize.SerializableObject):
-    "Basic point class"
-    x = cypyserialize.double()
-    y = cypyserialize.uint()
+class BoundingBoxDatagram(GenericDatagram):
+    body = BoundingBox()
 
 
-class cPoint3D(cypyserialize.SerializableObject):
-    "Basic point class"
-    x = cypyserialize.double()
-    y = cypyserialize.double()
-    z = cypyserialize.double()
+class KeptBoundingBoxDatagram(BoundingBoxDatagram):
+    _keep_packed = True
 
 
-class cBoundingBox(cypyserialize.SerializableObject):
-    northwest = cPoint()
-    southeast = cPoint()
-    northsouth = cPoint()
+class Path(cypyserialize.SerializableObject):
+    points = cypyserialize.SerializableArray(
+        Point(),
+        count=cypyserialize.uint()
+    )
 
 
-class cExtents(cypyserialize.SerializableObject):
-    count = cypyserialize.double()
-    extents = cBoundingBox()
+class Samples(cypyserialize.SerializableObject):
+    values = cypyserialize.SerializableArray(
+        cypyserialize.double(),
+        count=cypyserialize.uint()
+    )
+
+
+class Named(cypyserialize.SerializableObject):
+    id = cypyserialize.uint()
+    name = cypyserialize.string(32)
+    payload = cypyserialize.bytes_(64)
+
+
+class Message(cypyserialize.SerializableObject):
+    kind = cypyserialize.uchar()
+    length = cypyserialize.ushort()
+    body = cypyserialize.none()
+
+
+class PointMessage(Message):
+    kind = cypyserialize.uchar(value=1)
+    body = Point()
+
+
+class ExtentsMessage(Message):
+    kind = cypyserialize.uchar(value=2)
+    body = Extents()
+
+
+MESSAGES = cypyserialize.Registry(Message, tag='kind', length='length')
+MESSAGES.register(PointMessage)
+MESSAGES.register(ExtentsMessage)
+
+
+class Stamped(cypyserialize.SerializableObject):
+    timestamp = cypyserialize.uint(getter=time.gmtime)
+    cached_timestamp = cypyserialize.uint(getter=time.gmtime, cached=True)
 
 
-class PyPoint():
+class PyPoint(object):
     struct = struct.Struct("=dI")
 
     def __init__(self, bindata=None):
@@ -77,7 +99,7 @@ class PyPoint():
         return self.struct.pack(self.x, self.y)
 
 
-class PyBoundingBox():
+class PyBoundingBox(object):
     struct = struct.Struct("=dIdIdI")
 
     def __init__(self, bindata=None):
@@ -99,7 +121,7 @@ class PyBoundingBox():
             self.northsouth.x, self.northsouth.y)
 
 
-class PyExtents():
+class PyExtents(object):
     struct = struct.Struct("=ddIdIdI")
 
     def __init__(self, bindata=None):
@@ -0,0 +1,405 @@
+"""Benchmarks for cypyserialize
+
+    python benchmarks/run.py [-k FILTER] [--json results.json] [--compare previous.json]
+
+Each case reports operations per second, the best of several timeit repeats,
+and allocations per op, the number of memory blocks still allocated after an
+operation when its result is kept (temporaries freed within the operation
+aren't counted). Cases with a baseline are also reported relative to the
+equivalent plain struct.Struct code. Results written with --json can be
+passed to --compare on a later run to diff the two.
+"""
+from __future__ import print_function
+from __future__ import division
+
+import argparse
+import gc
+import json
+import os
+import platform
+import struct
+import sys
+import time
+import timeit
+
+# objects.py, and the package as built in place in the repository root
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [here, os.path.dirname(here)]
+
+from objects import *
+
+POINT_BYTES = struct.pack("=dI", 1.0, 2)
+EXTENTS_FORMAT = "ddIdIdI"
+EXTENTS_BYTES = struct.pack("=" + EXTENTS_FORMAT, 10.0, 1.0, 2, 4.0, 5, 4.0, 5)
+BOUNDING_BOX_BYTES = EXTENTS_BYTES[8:]
+DATAGRAM_BYTES = struct.pack("=BIdIdIdIB", 0x02, 1398373100, 1.0, 2, 4.0, 5, 4.0, 5, 0x03)
+MESSAGE_BYTES = struct.pack("=BH", 1, 15) + POINT_BYTES + struct.pack("=BH", 2, 47) + EXTENTS_BYTES
+NAMED_BYTES = struct.pack("=I32s64s", 1, b"sounding line 0001", bytes(range(64)))
+ARRAY_SIZES = (10, 1000, 100000)
+
+CASES = []
+
+
+def case(name, baseline=None):
+    """Registers a case, the decorated function returns the operation to time"""
+    def register(setup):
+        CASES.append((name, baseline, setup))
+        return setup
+    return register
+
+
+# unpack
+
+@case("struct unpack Point")
+def _():
+    s = PyPoint.struct
+    return lambda: s.unpack(POINT_BYTES)
+
+@case("unpack Point", baseline="struct unpack Point")
+def _():
+    return lambda: Point(POINT_BYTES)
+
+@case("struct unpack Extents")
+def _():
+    return lambda: PyExtents(EXTENTS_BYTES)
+
+@case("unpack Extents", baseline="struct unpack Extents")
+def _():
+    return lambda: Extents(EXTENTS_BYTES)
+
+@case("unpack method Extents", baseline="struct unpack Extents")
+def _():
+    e = Extents(EXTENTS_BYTES)
+    return lambda: e.unpack(EXTENTS_BYTES)
+
+@case("unpack_into Extents", baseline="struct unpack Extents")
+def _():
+    e = Extents(EXTENTS_BYTES)
+    return lambda: e.unpack_into(EXTENTS_BYTES)
+
+@case("struct dispatch Message[1000]")
+def _():
+    structs = {1: struct.Struct("=BHdI"), 2: struct.Struct("=BH" + EXTENTS_FORMAT)}
+    buff = MESSAGE_BYTES * 500
+    def op():
+        records = []
+        pos = 0
+        while pos < len(buff):
+            s = structs[buff[pos]]
+            records.append(s.unpack_from(buff, pos))
+            pos += s.size
+        return records
+    return op
+
+@case("registry iter_unpack Message[1000]", baseline="struct dispatch Message[1000]")
+def _():
+    buff = MESSAGE_BYTES * 500
+    return lambda: list(MESSAGES.iter_unpack(buff))
+
+@case("struct unpack Named")
+def _():
+    s = struct.Struct("=I32s64s")
+    def op():
+        id, name, payload = s.unpack(NAMED_BYTES)
+        return id, name.rstrip(b'\x00').decode(), payload
+    return op
+
+@case("unpack Named", baseline="struct unpack Named")
+def _():
+    return lambda: Named(NAMED_BYTES)
+
+@case("struct unpack BoundingBox")
+def _():
+    return lambda: PyBoundingBox(BOUNDING_BOX_BYTES)
+
+@case("unpack BoundingBoxDatagram", baseline="struct unpack BoundingBox")
+def _():
+    return lambda: BoundingBoxDatagram(DATAGRAM_BYTES)
+
+# pack
+
+@case("struct pack Extents")
+def _():
+    e = PyExtents(EXTENTS_BYTES)
+    return e.pack
+
+@case("pack Extents", baseline="struct pack Extents")
+def _():
+    e = Extents(EXTENTS_BYTES)
+    return e.pack
+
+@case("pack_into Extents", baseline="struct pack Extents")
+def _():
+    e = Extents(EXTENTS_BYTES)
+    buff = bytearray(len(EXTENTS_BYTES))
+    return lambda: e.pack_into(buff)
+
+@case("struct pack BoundingBox")
+def _():
+    b = PyBoundingBox(BOUNDING_BOX_BYTES)
+    return b.pack
+
+@case("pack BoundingBoxDatagram", baseline="struct pack BoundingBox")
+def _():
+    d = BoundingBoxDatagram(DATAGRAM_BYTES)
+    return d.pack
+
+@case("pack BoundingBoxDatagram new timestamp", baseline="struct pack BoundingBox")
+def _():
+    d = BoundingBoxDatagram(DATAGRAM_BYTES)
+    def pack():
+        d.timestamp += 1
+        return d.pack()
+    return pack
+
+@case("repack BoundingBoxDatagram new timestamp", baseline="struct pack BoundingBox")
+def _():
+    d = KeptBoundingBoxDatagram(DATAGRAM_BYTES)
+    def pack():
+        d.timestamp += 1
+        return d.pack()
+    return pack
+
+@case("packed_view BoundingBoxDatagram new timestamp", baseline="struct pack BoundingBox")
+def _():
+    d = KeptBoundingBoxDatagram(DATAGRAM_BYTES)
+    def pack():
+        d.timestamp += 1
+        return d.packed_view()
+    return pack
+
+# attribute access
+
+@case("python get nested attribute")
+def _():
+    e = PyExtents(EXTENTS_BYTES)
+    return lambda: e.extents.northwest.x
+
+@case("get nested attribute", baseline="python get nested attribute")
+def _():
+    e = Extents(EXTENTS_BYTES)
+    return lambda: e.extents.northwest.x
+
+@case("get dotted item", baseline="python get nested attribute")
+def _():
+    e = Extents(EXTENTS_BYTES)
+    return lambda: e['extents.northwest.x']
+
+@case("get attribute with getter")
+def _():
+    s = Stamped(timestamp=1398373100, cached_timestamp=1398373100)
+    return lambda: s.timestamp
+
+@case("get cached attribute with getter", baseline="get attribute with getter")
+def _():
+    s = Stamped(timestamp=1398373100, cached_timestamp=1398373100)
+    return lambda: s.cached_timestamp
+
+@case("python set attribute")
+def _():
+    p = PyPoint(POINT_BYTES)
+    def op():
+        p.x = 3.0
+    return op
+
+@case("set attribute", baseline="python set attribute")
+def _():
+    p = Point(POINT_BYTES)
+    def op():
+        p.x = 3.0
+    return op
+
+@case("set dotted item", baseline="python set attribute")
+def _():
+    e = Extents(EXTENTS_BYTES)
+    def op():
+        e['extents.northwest.x'] = 3.0
+    return op
+
+@case("struct unpack Extents[1000]")
+def _():
+    s = struct.Struct("=ddIdIdI")
+    buff = EXTENTS_BYTES * 1000
+    return lambda: list(s.iter_unpack(buff))
+
+@case("unpack_batch Extents[1000]", baseline="struct unpack Extents[1000]")
+def _():
+    buff = EXTENTS_BYTES * 1000
+    return lambda: Extents.unpack_batch(buff)
+
+@case("decode_records Extents[1000]", baseline="struct unpack Extents[1000]")
+def _():
+    buff = EXTENTS_BYTES * 1000
+    return lambda: Extents.decode_records(buff)
+
+@case("items to dict Extents")
+def _():
+    e = Extents(EXTENTS_BYTES)
+    def to_dict(obj):
+        return {name: to_dict(value) if isinstance(value, cypyserialize.SerializableObject) else value for name, value in obj.items()}
+    return lambda: to_dict(e)
+
+@case("to_dict Extents", baseline="items to dict Extents")
+def _():
+    e = Extents(EXTENTS_BYTES)
+    return lambda: e.to_dict(flatten=False)
+
+@case("struct extract Extents[1000]")
+def _():
+    s = struct.Struct("=ddIdIdI")
+    buff = EXTENTS_BYTES * 1000
+    return lambda: [(r[1], r[6]) for r in s.iter_unpack(buff)]
+
+@case("extract_many Extents[1000]", baseline="struct extract Extents[1000]")
+def _():
+    buff = EXTENTS_BYTES * 1000
+    return lambda: Extents.extract_many(buff, ['extents.northwest.x', 'extents.southeast.y'])
+
+# arrays
+
+def array_cases(n):
+    samples = struct.pack("=I%dd" % n, n, *range(n))
+    points = struct.pack("=I" + "dI" * n, n, *([1.0, 2] * n))
+
+    @case("struct unpack Samples[{}]".format(n))
+    def _():
+        s = struct.Struct("=I%dd" % n)
+        return lambda: s.unpack(samples)
+
+    @case("unpack Samples[{}]".format(n), baseline="struct unpack Samples[{}]".format(n))
+    def _():
+        return lambda: Samples(samples)
+
+    @case("pack Samples[{}]".format(n))
+    def _():
+        s = Samples(samples)
+        return s.pack
+
+    @case("struct unpack Path[{}]".format(n))
+    def _():
+        s = struct.Struct("=I" + "dI" * n)
+        return lambda: s.unpack(points)
+
+    @case("unpack Path[{}]".format(n), baseline="struct unpack Path[{}]".format(n))
+    def _():
+        return lambda: Path(points)
+
+    @case("unpack_into Path[{}]".format(n), baseline="struct unpack Path[{}]".format(n))
+    def _():
+        p = Path(points)
+        return lambda: p.unpack_into(points)
+
+    @case("pack Path[{}]".format(n))
+    def _():
+        p = Path(points)
+        return p.pack
+
+    if n <= 1000:
+        @case("append Samples[{}]".format(n))
+        def _():
+            def op():
+                s = Samples()
+                for i in range(n):
+                    s.values.append(1.0)
+                return s
+            return op
+
+        @case("append Path[{}]".format(n))
+        def _():
+            def op():
+                p = Path()
+                for i in range(n):
+                    p.points.append(1.0, 2)
+                return p
+            return op
+
+        @case("extend Path[{}]".format(n))
+        def _():
+            rows = [(1.0, 2)] * n
+            def op():
+                p = Path()
+                p.points.extend(rows)
+                return p
+            return op
+
+for _n in ARRAY_SIZES:
+    array_cases(_n)
+
+
+def ops_per_sec(func, repeat):
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return number / min(timer.repeat(repeat, number))
+
+
+def allocations_per_op(func, count=1000):
+    results = [None] * count
+    func()  # warm up caches
+    gc.collect()
+    gc.disable()
+    try:
+        before = sys.getallocatedblocks()
+        for i in range(count):
+            results[i] = func()
+        after = sys.getallocatedblocks()
+    finally:
+        gc.enable()
+    return (after - before) / count
+
+
+def run(pattern=None, repeat=5):
+    results = {}
+    for name, baseline, setup in CASES:
+        if pattern and pattern not in name and (baseline is None or pattern not in baseline):
+            continue
+        func = setup()
+        results[name] = {
+            "ops_per_sec": ops_per_sec(func, repeat),
+            "allocs_per_op": allocations_per_op(func, 10 if "100000" in name else 1000),
+            "baseline": baseline,
+        }
+        report(name, results)
+    return results
+
+
+def report(name, results, previous=None):
+    result = results[name]
+    line = "{:<40} {:>14,.0f} ops/s {:>10.1f} allocs/op".format(name, result["ops_per_sec"], result["allocs_per_op"])
+    if result["baseline"] in results:
+        line += " {:>8.2f}x baseline".format(result["ops_per_sec"] / results[result["baseline"]]["ops_per_sec"])
+    if previous is not None and name in previous:
+        line += " {:>+8.1%} vs previous".format(result["ops_per_sec"] / previous[name]["ops_per_sec"] - 1)
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="cypyserialize benchmarks")
+    parser.add_argument("-k", dest="pattern", help="only run cases whose name contains PATTERN")
+    parser.add_argument("--repeat", type=int, default=5, help="timeit repeats, the best is reported")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="results of a previous run to compare against")
+    args = parser.parse_args()
+
+    results = run(args.pattern, args.repeat)
+
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)["results"]
+        print()
+        print("compared with {}".format(args.compare))
+        for name in results:
+            report(name, results, previous)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "implementation": platform.python_implementation(),
+                "platform": platform.platform(),
+                "results": results,
+            }, f, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
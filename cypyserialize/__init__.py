@@ -1 +1,2 @@
 from .serializable import *
+from .records import RecordFile, RecordIndex, parallel_decode
@@ -0,0 +1,117 @@
+"""asyncio support for streams of SerializableObject records
+
+    from cypyserialize.aio import read_messages, write_messages
+
+    async for msg in read_messages(reader, BoundingBoxDatagram):
+        ...
+"""
+import asyncio
+import collections
+
+from .serializable import FrameBuffer
+
+
+async def read_messages(reader, cls, chunk_size=65536):
+    """Yields records of cls (a class or a Registry) read from an asyncio.StreamReader
+
+    Data is read chunk_size bytes at a time when the records already
+    decoded have been consumed, so a slow consumer stops reading and the
+    reader's own limit pauses the transport. Raises EOFError if the stream
+    ends part way through a record.
+    """
+    frames = FrameBuffer(cls)
+    while True:
+        data = await reader.read(chunk_size)
+        if not data:
+            break
+        for message in frames.feed(data):
+            yield message
+        if frames.error is not None:
+            break
+    frames.close()
+
+
+async def write_messages(writer, messages):
+    """Packs messages and writes them with a single writelines, then waits for the writer to drain"""
+    writer.writelines([message.pack() for message in messages])
+    await writer.drain()
+
+
+class MessageProtocol(asyncio.Protocol):
+    """Protocol decoding records of cls (a class or a Registry) from a connection
+
+    Records are queued as they are completed and are consumed with
+    async for. Reading is paused while more than high_water records are
+    waiting, and resumed once they're down to low_water (high_water // 4 by
+    default). The iteration ends when the connection is closed, raising
+    EOFError if it ended part way through a record.
+    """
+
+    def __init__(self, cls, high_water=1024, low_water=None):
+        self.cls = cls
+        self.high_water = high_water
+        self.low_water = high_water // 4 if low_water is None else low_water
+        self.transport = None
+        self._frames = FrameBuffer(cls)
+        self._messages = collections.deque()
+        self._waiter = None
+        self._paused = False
+        self._closed = False
+        self._error = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data):
+        try:
+            self._messages.extend(self._frames.feed(data))
+            if self._frames.error is not None:
+                # the records preceding the error are queued, raise it now
+                self._frames.close()
+        except Exception as e:
+            self._error = e
+            self.transport.close()
+        if len(self._messages) > self.high_water and not self._paused:
+            self._paused = True
+            self.transport.pause_reading()
+        self._wake()
+
+    def eof_received(self):
+        # let connection_lost close the iteration
+        return False
+
+    def connection_lost(self, exc):
+        self._closed = True
+        if self._error is None:
+            self._error = exc
+        self._wake()
+
+    def write_messages(self, messages):
+        """Packs messages and writes them with a single writelines"""
+        self.transport.writelines([message.pack() for message in messages])
+
+    def _wake(self):
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self._messages:
+            if self._closed:
+                if self._error is not None:
+                    raise self._error
+                self._frames.close()
+                raise StopAsyncIteration
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+
+        message = self._messages.popleft()
+        if self._paused and len(self._messages) <= self.low_water:
+            self._paused = False
+            self.transport.resume_reading()
+        return message
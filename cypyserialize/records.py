@@ -0,0 +1,356 @@
+import array
+import bisect
+import functools
+import mmap
+import multiprocessing
+import os
+import struct
+import sys
+import zlib
+
+from .serializable import SerializableField, TruncatedError, _scan_records
+
+
+def record_size(cls):
+    "Size in bytes of a record of cls, which must not have variable length fields"
+    if cls._plan is None:
+        raise NotImplementedError('{} has NoneType fields that must be implemented in a subclass'.format(cls.__name__))
+    if cls._plan.fixed_size < 0:
+        raise TypeError("{} has variable length fields, records can't be indexed".format(cls.__name__))
+    return cls._plan.fixed_size
+
+
+class RecordFile(object):
+    """Random access to a file of consecutive fixed size records of one class
+
+    The file is memory mapped, records are located from their index and
+    the record size without reading the file into Python memory. With
+    lazy=True (default) records are returned as views (see
+    SerializableObject.view) that decode fields when they are read,
+    otherwise each record is decoded when it is accessed. Opening with
+    mode='r+' lets views write through to the file.
+    """
+
+    def __init__(self, cls, path, mode='r', lazy=True):
+        if mode not in ('r', 'r+'):
+            raise ValueError("mode must be 'r' or 'r+', given '{}'".format(mode))
+
+        self.cls = cls
+        self.path = path
+        self.lazy = lazy
+        self.record_size = record_size(cls)
+
+        self._file = open(path, mode + 'b')
+        file_size = os.fstat(self._file.fileno()).st_size
+        self._count = file_size // self.record_size
+        self._mm = None
+        if file_size > 0:
+            access = mmap.ACCESS_READ if mode == 'r' else mmap.ACCESS_WRITE
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=access)
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self._record(i) for i in range(*key.indices(self._count))]
+        elif isinstance(key, int):
+            if key < 0:
+                key += self._count
+            if key < 0 or key >= self._count:
+                raise IndexError("Record {} not in file of {} records".format(key, self._count))
+            return self._record(key)
+        else:
+            raise TypeError("Record indices must be integers or slices, not {}".format(type(key).__name__))
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self._record(i)
+
+    def _record(self, index):
+        offset = index * self.record_size
+        if self.lazy:
+            return self.cls.view(self._mm, offset)
+        return self.cls(self._mm[offset:offset + self.record_size])
+
+    def close(self):
+        "Closes the file, views of its records must have been released"
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+# magic, byte order, record count, bytes of the data file indexed, crc32 of the last record, length of the names
+_INDEX_HEADER = struct.Struct('<8scQQIH')
+_INDEX_MAGIC = b'CPYIDX01'
+
+
+class RecordIndex(object):
+    """Offsets of the records of a file of one class, kept in a sidecar file
+
+    Records are located with one pass over the file reading only the
+    fields a record's size depends on (counts of arrays, lengths of bytes_)
+    and skipping the rest, so files of variable length records like Path
+    get O(1) random access. keys are paths to fields at a fixed offset,
+    like a timestamp, whose values are indexed too and can be searched
+    with seek. The index is saved to index_path (path + '.idx' by default);
+    when it's opened again only the records appended to the file since are
+    scanned, and it's rebuilt if the file was otherwise changed.
+    """
+
+    def __init__(self, cls, path, keys=(), index_path=None):
+        self.cls = cls
+        self.path = path
+        self.keys = tuple(keys)
+        self.index_path = index_path if index_path is not None else path + '.idx'
+        self._names = ' '.join((cls.__name__,) + self.keys).encode('utf-8')
+        self._reset()
+        self._file = open(path, 'rb')
+        self._mm = None
+        self._load()
+        self.update()
+
+    def update(self):
+        """Indexes the records appended to the file since the last update, returns how many"""
+        file_size = os.fstat(self._file.fileno()).st_size
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if file_size == 0:
+            # truncated, the records indexed before are gone
+            if self.end > 0:
+                self._reset()
+                self.save()
+            return 0
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        rebuilt = self.end > file_size or self._tail_crc() != self._crc
+        if rebuilt:
+            self._reset()
+        offsets, columns, end = _scan_records(self.cls, self._mm, self.end, self.keys)
+        if len(offsets) == 0:
+            if rebuilt:
+                self.save()
+            return 0
+        self.offsets.extend(offsets)
+        for key, column in zip(self.keys, columns):
+            self.columns[key].extend(column)
+        self.end = end
+        self._crc = self._tail_crc()
+        self.save()
+        return len(offsets)
+
+    def save(self):
+        "Writes the index to index_path, replacing the previous one"
+        temporary = self.index_path + '.tmp'
+        with open(temporary, 'wb') as f:
+            f.write(_INDEX_HEADER.pack(_INDEX_MAGIC, sys.byteorder[0].encode(), len(self.offsets), self.end, self._crc, len(self._names)))
+            f.write(self._names)
+            self.offsets.tofile(f)
+            for key in self.keys:
+                self.columns[key].tofile(f)
+        os.replace(temporary, self.index_path)
+
+    def _load(self):
+        self._reset()
+        try:
+            with open(self.index_path, 'rb') as f:
+                magic, byte_order, count, end, crc, names_size = _INDEX_HEADER.unpack(f.read(_INDEX_HEADER.size))
+                if magic != _INDEX_MAGIC or byte_order != sys.byteorder[0].encode() or f.read(names_size) != self._names:
+                    return
+                self.offsets.fromfile(f, count)
+                for key in self.keys:
+                    self.columns[key].fromfile(f, count)
+        except (OSError, EOFError, struct.error):
+            self._reset()
+            return
+        self.end = end
+        self._crc = crc
+
+    def _reset(self):
+        # scanning nothing checks the keys and gives arrays of the right type
+        _, columns, _ = _scan_records(self.cls, b'', 0, self.keys)
+        self.offsets = array.array('Q')
+        self.columns = dict(zip(self.keys, columns))   # values of each key
+        self.end = 0        # offset following the last indexed record
+        self._crc = 0
+
+    def _tail_crc(self):
+        if len(self.offsets) == 0:
+            return 0
+        return zlib.crc32(self._mm[self.offsets[-1]:self.end])
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self._record(i) for i in range(*key.indices(len(self.offsets)))]
+        elif isinstance(key, int):
+            if key < 0:
+                key += len(self.offsets)
+            if key < 0 or key >= len(self.offsets):
+                raise IndexError("Record {} not in file of {} records".format(key, len(self.offsets)))
+            return self._record(key)
+        else:
+            raise TypeError("Record indices must be integers or slices, not {}".format(type(key).__name__))
+
+    def __iter__(self):
+        for i in range(len(self.offsets)):
+            yield self._record(i)
+
+    def _record(self, index):
+        start = self.offsets[index]
+        end = self.offsets[index + 1] if index + 1 < len(self.offsets) else self.end
+        return self.cls(self._mm[start:end])
+
+    def seek(self, key, low, high=None):
+        """range of the indexes of records whose key is from low up to, but excluding, high
+
+        The values of key must be in ascending order in the file, as
+        timestamps usually are. With high=None the range ends with the last
+        record whose key equals low.
+        """
+        column = self.columns[key]
+        start = bisect.bisect_left(column, low)
+        stop = bisect.bisect_right(column, low) if high is None else bisect.bisect_left(column, high)
+        return range(start, max(start, stop))
+
+    def chunks(self, chunk_size):
+        "(start, end) byte ranges of about chunk_size bytes that begin and end on record boundaries"
+        chunks = []
+        start = 0
+        while start < self.end:
+            i = bisect.bisect_left(self.offsets, start + chunk_size)
+            end = self.offsets[i] if i < len(self.offsets) else self.end
+            if end <= start:
+                end = self.offsets[i + 1] if i + 1 < len(self.offsets) else self.end
+            chunks.append((start, end))
+            start = end
+        return chunks
+
+    def close(self):
+        "Closes the file"
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def parallel_decode(cls, path, workers=None, reducer=None, sync=None, chunk_size=1 << 26, index=None):
+    """Decodes a file of records of one class in a pool of worker processes
+
+    The file is split into chunks of about chunk_size bytes that each
+    worker memory maps and decodes itself, so no file data is pickled.
+    Chunks of fixed size records start on a record boundary. Variable
+    length records need an index (a RecordIndex of the file) to split it
+    on record boundaries, or sync, the name of a field with a fixed value
+    (like GenericDatagram.STX), the first record of a chunk is then found
+    by scanning for that value followed by a record that also starts with
+    it.
+
+    With reducer=None the records are yielded in file order, otherwise
+    reducer is called in the worker with an iterator over the records of a
+    chunk and the reductions are yielded in file order. cls and reducer
+    must be picklable, i.e. defined at the top level of a module.
+    """
+    marker = None
+    if index is not None:
+        index.update()
+        chunks = index.chunks(chunk_size)
+    else:
+        if cls._plan is not None and cls._plan.fixed_size < 0:
+            if sync is None:
+                raise TypeError("{} has variable length fields, the file can only be split on a sync field or with an index".format(cls.__name__))
+            marker = sync_marker(cls, sync)
+        else:
+            size = record_size(cls)
+            chunk_size = max(chunk_size // size, 1) * size
+
+        file_size = os.path.getsize(path)
+        chunks = [(start, min(start + chunk_size, file_size)) for start in range(0, file_size, chunk_size)]
+    decode = functools.partial(_decode_chunk, cls, path, reducer or list, marker)
+    return _pool_results(decode, chunks, workers, reducer is None)
+
+
+def _pool_results(decode, chunks, workers, flatten):
+    with multiprocessing.Pool(workers) as pool:
+        for result in pool.imap(decode, chunks):
+            if flatten:
+                for record in result:
+                    yield record
+            else:
+                yield result
+
+
+def sync_marker(cls, name):
+    "Offset and packed bytes of the fixed value of the field name"
+    field = cls.__dict__.get(name)
+    if not isinstance(field, SerializableField):
+        raise ValueError("'{}' is not a field of {}".format(name, cls.__name__))
+    offset = cls._schema.offsets[cls._field_order.index(name)]
+    value = getattr(cls(), name)
+    if offset is None or value is None:
+        raise ValueError("'{}' needs a value and a fixed offset to sync on".format(name))
+    byte_order = field.byte_order or cls._plan.byte_order
+    return offset, struct.pack(byte_order + field.__format, value)
+
+
+def _decode_chunk(cls, path, reducer, marker, chunk):
+    start, end = chunk
+    with open(path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            buffer = memoryview(mm)
+            if marker is None:
+                records = cls.iter_unpack(buffer[start:end])
+            else:
+                records = _framed_records(cls, buffer, start, end, marker)
+            try:
+                return reducer(records)
+            finally:
+                records.close()
+                del records
+                buffer.release()
+        finally:
+            mm.close()
+
+
+def _framed_records(cls, buffer, start, end, marker):
+    "Records that start between start and end"
+    pos = start if start == 0 else _resync(cls, buffer, start, end, marker)
+    while pos < end:
+        record = cls()
+        pos += record.unpack(buffer[pos:])
+        yield record
+
+
+def _resync(cls, buffer, pos, end, marker):
+    "Offset of the first record starting at or after pos, end if there's none before it"
+    offset, value = marker
+    data = buffer.obj
+    while True:
+        found = data.find(value, pos + offset)
+        if found < 0 or found - offset >= end:
+            return end
+        candidate = found - offset
+        try:
+            following = candidate + cls().unpack(buffer[candidate:])
+        except (TruncatedError, ValueError):
+            # garbage read as a record, e.g. a negative count or undecodable text
+            following = -1
+        if following == len(buffer) or following > 0 and buffer[following + offset:following + offset + len(value)] == value:
+            return candidate
+        pos = candidate + 1
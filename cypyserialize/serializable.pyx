@@ -1,10 +1,23 @@
 import inspect
 import types
 import struct as structure
+import array
+import itertools
+import os
+import sys
 
 from libc.stdint cimport int8_t, uint8_t, int16_t, uint16_t, int32_t, uint32_t, int64_t, uint64_t
-
+from libc.stdlib cimport malloc, free
+from libc.string cimport memcpy, memset
+from cpython.ref cimport PyObject, Py_INCREF, Py_DECREF
+from cpython.tuple cimport PyTuple_New, PyTuple_SET_ITEM
+from cpython.buffer cimport PyObject_GetBuffer, PyObject_CheckBuffer, PyBuffer_Release, PyBUF_WRITABLE, PyBUF_SIMPLE
+from cpython.bytearray cimport PyByteArray_FromStringAndSize, PyByteArray_AS_STRING
+from cpython.bytes cimport PyBytes_FromStringAndSize
+
+from cpython cimport array
 cimport cython
+from cython.parallel cimport prange
 
 from .serializers cimport *
 
@@ -17,8 +30,163 @@ except:
     # python 3
     string_types = (bytes, str)
 
+# arguments the constructor decodes rather than assigns
+binary_types = string_types + (memoryview, bytearray, type(b''))
+
 # global counter used to detect declaration order
 cdef uint64_t STRUCT_OBJECT_COUNTER = 0
+cdef uint64_t PIPELINE_CHANGES = 0  # counts setters and validators added to fields, see Schema.is_plain
+
+
+class TruncatedError(ValueError):
+    """Raised when the data ends before a field it should hold"""
+    def __init__(self, field, needed, available):
+        ValueError.__init__(self, "'{}' needs {} bytes, only {} available".format(field, needed, available))
+        self.field = field
+        self.needed = needed
+        self.available = available
+
+
+cdef extern from *:
+    """
+    #ifdef _WIN32
+    #define WIN32_LEAN_AND_MEAN
+    #include <windows.h>
+    static unsigned long long cypyserialize_clock_ns(void) {
+        static LARGE_INTEGER frequency;
+        LARGE_INTEGER now;
+        if (frequency.QuadPart == 0) QueryPerformanceFrequency(&frequency);
+        QueryPerformanceCounter(&now);
+        return (unsigned long long)(now.QuadPart / frequency.QuadPart) * 1000000000ULL
+            + (unsigned long long)(now.QuadPart % frequency.QuadPart) * 1000000000ULL / frequency.QuadPart;
+    }
+    #else
+    #include <time.h>
+    static unsigned long long cypyserialize_clock_ns(void) {
+        struct timespec now;
+        clock_gettime(CLOCK_MONOTONIC, &now);
+        return (unsigned long long)now.tv_sec * 1000000000ULL + now.tv_nsec;
+    }
+    #endif
+    """
+    uint64_t clock_ns "cypyserialize_clock_ns" () nogil
+
+
+# instrumentation, see enable_instrumentation
+cdef bint INSTRUMENTED = False
+cdef uint64_t SAMPLE_EVERY = 0     # 0, or sample one call in SAMPLE_EVERY
+cdef uint64_t SAMPLE_CALLS = 0
+cdef dict STATS = {}               # {owner: {operation: Counter}}, owner is a class or a field
+
+cdef struct probe_t:
+    uint64_t    start
+    bint        sampled     # True when the call counts the memory blocks it leaves allocated
+    Py_ssize_t  blocks      # allocated memory blocks at the start of a sampled call
+
+
+cdef class Counter(object):
+    """Totals for one operation of a class or field"""
+    cdef:
+        uint64_t calls
+        uint64_t bytes
+        uint64_t total_ns
+        uint64_t max_ns
+        uint64_t sampled
+        int64_t  allocations    # memory blocks left allocated by the sampled calls
+
+    cdef inline void add(self, Py_ssize_t nbytes, uint64_t elapsed, bint sampled, Py_ssize_t blocks):
+        self.calls += 1
+        self.bytes += nbytes
+        self.total_ns += elapsed
+        if elapsed > self.max_ns:
+            self.max_ns = elapsed
+        if sampled:
+            self.sampled += 1
+            self.allocations += blocks
+
+    def as_dict(self):
+        return {'calls': self.calls, 'bytes': self.bytes, 'total_ns': self.total_ns, 'max_ns': self.max_ns,
+                'sampled': self.sampled, 'allocations': self.allocations}
+
+
+cdef inline bint sample() noexcept:
+    """True for one call in SAMPLE_EVERY"""
+    global SAMPLE_CALLS
+    if SAMPLE_EVERY == 0:
+        return False
+    SAMPLE_CALLS += 1
+    return SAMPLE_CALLS % SAMPLE_EVERY == 0
+
+
+cdef inline probe_t start_probe():
+    cdef probe_t probe
+    probe.sampled = sample()
+    probe.blocks = sys.getallocatedblocks() if probe.sampled else 0
+    probe.start = clock_ns()
+    return probe
+
+
+cdef int stop_probe(probe_t * probe, object owner, unicode operation, Py_ssize_t nbytes) except -1:
+    cdef uint64_t elapsed = clock_ns() - probe.start
+    cdef Py_ssize_t blocks = 0
+    cdef dict operations
+    cdef object counter
+    if probe.sampled:
+        # calls may free more blocks than they allocate
+        blocks = sys.getallocatedblocks() - probe.blocks
+    operations = STATS.get(owner)
+    if operations is None:
+        operations = STATS[owner] = {}
+    counter = operations.get(operation)
+    if counter is None:
+        counter = operations[operation] = Counter()
+    (<Counter>counter).add(nbytes, elapsed, probe.sampled, blocks)
+    return 0
+
+
+def enable_instrumentation(sample_every=0):
+    """Starts counting calls, bytes and time of pack and unpack by class, and by array field
+
+    With sample_every, one call in sample_every also counts the memory
+    blocks it leaves allocated, and the getters, setters and validators
+    of fields are timed on one read or write in sample_every.
+    """
+    global INSTRUMENTED, SAMPLE_EVERY
+    if sample_every < 0:
+        raise ValueError("sample_every must be 0 or more, given {}".format(sample_every))
+    SAMPLE_EVERY = sample_every
+    INSTRUMENTED = True
+
+
+def disable_instrumentation():
+    """Stops counting, the counts are kept until reset_instrumentation"""
+    global INSTRUMENTED
+    INSTRUMENTED = False
+
+
+def reset_instrumentation():
+    STATS.clear()
+
+
+def instrumentation_stats():
+    """Snapshot of the counts, {name: {operation: {'calls': ..., 'bytes': ..., ...}}}
+
+    Names are class names, and 'Class.field' for fields. Operations are
+    'pack' and 'unpack', and for sampled fields 'get' (the getters) and
+    'set' (setters and validators).
+    """
+    snapshot = {}
+    for owner, operations in STATS.items():
+        if isinstance(owner, Serializeable):
+            owner_name = (<Serializeable>owner).owner.__qualname__ if (<Serializeable>owner).owner is not None else '?'
+            name = '{}.{}'.format(owner_name, (<Serializeable>owner).__name)
+        else:
+            name = owner.__qualname__
+        entry = snapshot.setdefault(name, {})
+        for operation, counter in operations.items():
+            entry[operation] = (<Counter>counter).as_dict()
+    return snapshot
+
 
 cdef class Serializeable(object):
     """Descriptor class used for modeling a binary field or a fixed array of fields
@@ -28,6 +196,7 @@ cdef class Serializeable(object):
         readonly uint64_t __id               # instance id, used to infer declaration order of fields 
         readonly unicode  __name             # field name used to identify instance in parent container
         readonly uint64_t __index            # field index in parent container
+        readonly object   owner              # class the field was first declared on
 
     def __cinit__(self, *args, **kargs):
         global STRUCT_OBJECT_COUNTER
@@ -56,9 +225,15 @@ cdef class SerializableField(Serializeable):
         list            __validators
         serializer_t    _unpacker
         deserializer_t  _packer
+        serializer_t    _unpacker_swap  # used when the byte order differs from the host
+        deserializer_t  _packer_swap
+        readonly bytes  byte_order      # overrides the class byte order when set
         readonly size_t size
+        readonly bint   cached          # getter output is kept until the stored value changes
 
     def AddSetter(self, func):
+        global PIPELINE_CHANGES
+        PIPELINE_CHANGES += 1
         if self.__setters is None:
             self.__setters = []
         self.__setters.append(func)
@@ -69,11 +244,13 @@ cdef class SerializableField(Serializeable):
         self.__getters.append(func)
 
     def AddValidator(self, func):
+        global PIPELINE_CHANGES
+        PIPELINE_CHANGES += 1
         if self.__validators is None:
             self.__validators = []
         self.__validators.append(func)
 
-    def __cinit__(self, default=None, getter=None, setter=None, value=None):
+    def __cinit__(self, default=None, getter=None, setter=None, value=None, byte_order=None, cached=False):
         self.__default = None
         self.__setters = []
         self.__getters = []
@@ -83,6 +260,8 @@ cdef class SerializableField(Serializeable):
         if default is not None: self.__default = default
         if getter is not None: self.AddGetter(getter)
         if setter is not None: self.AddSetter(setter)
+        if byte_order is not None: self.byte_order = resolve_byte_order(byte_order)
+        self.cached = cached
         if value is not None:
             self.__default = value
 
@@ -94,29 +273,86 @@ cdef class SerializableField(Serializeable):
     def __get__(self, parent, parent_type):
         if parent is None:
             return self
+        if (<SerializableBase>parent).__view is not None:
+            return self.get_from_view((<SerializableBase>parent).__view)
+        if self.cached and self.__getters:
+            return self.get_cached(parent, self.__index)
         return self.get_by_index(parent, self.__index)
 
     def __set__(self, parent, value):
+        cdef bint check = (<Schema>type(parent)._schema).check_on_set
+        if (<SerializableBase>parent).__view is not None:
+            self.set_in_view((<SerializableBase>parent).__view, value, check)
+        elif value is None:
+            (<SerializableBase>parent).__values[self.__index] = self.__default
+        else:
+            (<SerializableBase>parent).__values[self.__index] = self.encoded(value, check)
+
+    cdef object get_from_view(self, ViewState view):
+        cdef step_t * step = view.plan.field_step(self.__index)
+        cdef uint32_t offset = step.offset
+        cdef object _tmp = make_object_from_variant(step.unpacker(view.data(), &offset))
+        for getter in self.__getters:
+            _tmp = getter(_tmp)
+        return _tmp
+
+    cdef int set_in_view(self, ViewState view, object value, bint check) except -1:
+        cdef step_t * step = view.plan.field_step(self.__index)
+        cdef uint32_t offset = step.offset
         if value is None:
-            parent.__values[self.__index] = self.__default
+            if self.__default is None:
+                raise ValueError("'{}' has no default to write".format(self.__name))
+            value = self.__default
         else:
-            self.set_by_index(parent, self.__index, value)
-
-    cdef inline object get_by_index(self, Serializeable parent, uint64_t index):
-        cdef object _tmp = parent.__values[index]
+            value = self.encoded(value, check)
+        step.packer(view.writable_data(), &offset, value)
+
+    cdef inline object get_by_index(self, SerializableBase parent, uint64_t index):
+        return self.decoded(parent.__values[index])
+
+    cdef inline object set_by_index(self, SerializableBase parent, uint64_t index, object value):
+        parent.__values[index] = self.encoded(value)
+
+    cdef object get_cached(self, SerializableBase parent, uint64_t index):
+        """get_by_index, reusing the getters' output while the stored value is unchanged"""
+        cdef object stored = parent.__values[index]
+        cdef object value = parent.cached_decoded(index, stored)
+        if value is NO_VALUES:
+            value = self.decoded(stored)
+            parent.cache_decoded(index, stored, value)
+        return value
+
+    cdef inline object decoded(self, object _tmp):
+        """Stored value as read through the field"""
+        cdef probe_t probe
+        cdef bint timed
         if _tmp is None:
             return self.__default
         else:
+            timed = INSTRUMENTED and self.__getters and sample()
+            if timed:
+                probe.sampled = False
+                probe.start = clock_ns()
             for getter in self.__getters:
                 _tmp = getter(_tmp)
+            if timed:
+                stop_probe(&probe, self, 'get', 0)
             return _tmp
 
-    cdef inline object set_by_index(self, Serializeable parent, uint64_t index, object value):
+    cdef inline object encoded(self, object value, bint check=True):
+        """Value as stored by the field, after the setters and, when check is set, the validators"""
+        cdef probe_t probe
+        cdef bint timed = INSTRUMENTED and (self.__setters or self.__validators) and sample()
+        if timed:
+            probe.sampled = False
+            probe.start = clock_ns()
         for setter in self.__setters:
             value = setter(value)
-        if self.__validators is not None:
+        if check and self.__validators:
             self.validate(value)
-        parent.__values[index] = value
+        if timed:
+            stop_probe(&probe, self, 'set', 0)
+        return value
 
     def validate(self, value):
         if self.__validators is not None:
@@ -124,97 +360,121 @@ cdef class SerializableField(Serializeable):
                 if not validator(value):
                     raise Exception("Failed validator: {} with value {}".format(validator.__name__, value))
 
+    cdef inline bint swapped(self, bytes byte_order):
+        """True when values are byte swapped given the enclosing byte order"""
+        if self.byte_order is not None:
+            return self.byte_order != host_byte_order
+        return byte_order != host_byte_order
+
     cdef object _unpack(self, const unsigned char * buffer, uint32_t * offset):
         return make_object_from_variant(self._unpacker(buffer, offset))
 
 
 cdef class pad(SerializableField):
     """padding byte"""
-    def __cinit__(self, default=None, getter=None, setter=None, value=None):
+    def __cinit__(self, default=None, getter=None, setter=None, value=None, byte_order=None, cached=False):
         self.__format = b'x'
         self.__python_t = str
         self._unpacker = get_uint8
         self._packer = set_uint8
+        self._unpacker_swap = get_uint8_swap
+        self._packer_swap = set_uint8_swap
         self.size = sizeof(uint8_t)
 
 
 cdef class char(SerializableField):
     """string of length 1"""
-    def __cinit__(self, default=None, getter=None, setter=None, value=None):
+    def __cinit__(self, default=None, getter=None, setter=None, value=None, byte_order=None, cached=False):
         self.__format = b'c'
         self.__python_t = str
         self._unpacker = get_uint8
         self._packer = set_uint8
+        self._unpacker_swap = get_uint8_swap
+        self._packer_swap = set_uint8_swap
         self.size = sizeof(uint8_t)
 
 
 cdef class schar(SerializableField):
     """signed char"""
-    def __cinit__(self, default=None, getter=None, setter=None, value=None):
+    def __cinit__(self, default=None, getter=None, setter=None, value=None, byte_order=None, cached=False):
         self.__format = b'b'
         self.__python_t = int
         self._unpacker = get_int8
         self._packer = set_int8
+        self._unpacker_swap = get_int8_swap
+        self._packer_swap = set_int8_swap
         self.size = sizeof(int8_t)
 
 
 cdef class uchar(SerializableField):
     """unsigned char"""
-    def __cinit__(self, default=None, getter=None, setter=None, value=None):
+    def __cinit__(self, default=None, getter=None, setter=None, value=None, byte_order=None, cached=False):
         self.__format = b'B'
         self.__python_t = int
         self._unpacker = get_uint8
         self._packer = set_uint8
+        self._unpacker_swap = get_uint8_swap
+        self._packer_swap = set_uint8_swap
         self.size = sizeof(uint8_t)
 
 
 cdef class bool(SerializableField):
     """boolean value"""
-    def __cinit__(self, default=None, getter=None, setter=None, value=None):
+    def __cinit__(self, default=None, getter=None, setter=None, value=None, byte_order=None, cached=False):
         self.__format = b'?'
         self.__python_t = bool
         self._unpacker = get_uint8
         self._packer = set_uint8
+        self._unpacker_swap = get_uint8_swap
+        self._packer_swap = set_uint8_swap
         self.size = sizeof(uint8_t)
 
 
 cdef class short(SerializableField):
     """short"""
-    def __cinit__(self, default=None, getter=None, setter=None, value=None):
+    def __cinit__(self, default=None, getter=None, setter=None, value=None, byte_order=None, cached=False):
         self.__format = b'h'
         self.__python_t = int
         self._unpacker = get_int16
         self._packer = set_int16
+        self._unpacker_swap = get_int16_swap
+        self._packer_swap = set_int16_swap
         self.size = sizeof(int16_t)
 
 
 cdef class ushort(SerializableField):
     """unsigned short"""
-    def __cinit__(self, default=None, getter=None, setter=None, value=None):
+    def __cinit__(self, default=None, getter=None, setter=None, value=None, byte_order=None, cached=False):
         self.__format = b'H'
         self.__python_t = int
         self._unpacker = get_uint16
         self._packer = set_uint16
+        self._unpacker_swap = get_uint16_swap
+        self._packer_swap = set_uint16_swap
         self.size = sizeof(uint16_t)
 
 
 cdef class sint(SerializableField):
     """signed integer"""
-    def __cinit__(self, default=None, getter=None, setter=None, value=None):
+    def __cinit__(self, default=None, getter=None, setter=None, value=None, byte_order=None, cached=False):
         self.__format = b'i'
         self.__python_t = int
         self._unpacker = get_int32
         self._packer = set_int32
+        self._unpacker_swap = get_int32_swap
+        self._packer_swap = set_int32_swap
         self.size = sizeof(int32_t)
 
 
 cdef class uint(SerializableField):
     """unsigned integer"""
-    def __cinit__(self, default=None, getter=None, setter=None, value=None):
+    def __cinit__(self, default=None, getter=None, setter=None, value=None, byte_order=None, cached=False):
         self.__format = b'I'
         self.__python_t = int
         self._unpacker = get_uint32
         self._packer = set_uint32
+        self._unpacker_swap = get_uint32_swap
+        self._packer_swap = set_uint32_swap
         self.size = sizeof(uint32_t)
 
 # aliases for int32 types
@@ -224,41 +484,49 @@ cdef class ulong(uint): pass
 
 cdef class longlong(SerializableField):
     """signed long"""
-    def __cinit__(self, default=None, getter=None, setter=None, value=None):
+    def __cinit__(self, default=None, getter=None, setter=None, value=None, byte_order=None, cached=False):
         self.__format = b'l'
         self.__python_t = int
         self._unpacker = get_int64
         self._packer = set_int64
+        self._unpacker_swap = get_int64_swap
+        self._packer_swap = set_int64_swap
         self.size = sizeof(int64_t)
 
 
 cdef class ulonglong(SerializableField):
     """unsigned long"""
-    def __cinit__(self, default=None, getter=None, setter=None, value=None):
+    def __cinit__(self, default=None, getter=None, setter=None, value=None, byte_order=None, cached=False):
         self.__format = b'L'
         self.__python_t = int
         self._unpacker = get_uint64
         self._packer = set_uint64
+        self._unpacker_swap = get_uint64_swap
+        self._packer_swap = set_uint64_swap
         self.size = sizeof(uint64_t)
 
 
 cdef class double(SerializableField):
     """double"""
-    def __cinit__(self, default=None, getter=None, setter=None, value=None):
+    def __cinit__(self, default=None, getter=None, setter=None, value=None, byte_order=None, cached=False):
         self.__format = b'd'
         self.__python_t = float
         self._unpacker = get_double
         self._packer = set_double
+        self._unpacker_swap = get_double_swap
+        self._packer_swap = set_double_swap
         self.size = sizeof(double)
 
 
 cdef class float(SerializableField):
     """float"""
-    def __cinit__(self, default=None, getter=None, setter=None, value=None):
+    def __cinit__(self, default=None, getter=None, setter=None, value=None, byte_order=None, cached=False):
         self.__format = b'f'
         self.__python_t = float
         self._unpacker = get_float
         self._packer = set_float
+        self._unpacker_swap = get_float_swap
+        self._packer_swap = set_float_swap
         self.size = sizeof(float)
 
 
@@ -266,107 +534,333 @@ class none(SerializableField):
     pass
 
 
+cdef class bytes_(Serializeable):
+    """Raw bytes, either a fixed length or preceded by a count field
+
+    bytes_(16) always takes 16 bytes, shorter values are padded with nulls.
+    bytes_(count=uint()) takes as many bytes as its count says. Values are
+    decoded with a single copy, or as a memoryview of the buffer in views.
+    """
+    cdef:
+        readonly object     length      # fixed length in bytes, None when counted
+        SerializableField   __count
+        object              __default
+        readonly bint       __flat
+        readonly size_t     size        # packed size, excluding the data when counted
+
+    def __cinit__(self, length=None, count=None, default=None, **kargs):
+        if isinstance(count, int):
+            length, count = count, None
+        if (length is None) == (count is None):
+            raise TypeError("{} needs either a length or a count field".format(self.__class__.__name__))
+        if count is not None and not isinstance(count, SerializableField):
+            raise TypeError("The count of {} must be a field, given {}".format(self.__class__.__name__, count.__class__.__name__))
+
+        self.length = length
+        self.__count = count
+        self.__flat = length is not None
+        self.size = length if length is not None else (<SerializableField>count).size
+        self.__default = b'' if default is None else default
+
+    def __get__(self, parent, parent_type):
+        cdef ViewState view
+        cdef step_t * step
+        cdef object value
+        if parent is None:
+            return self
+
+        view = (<SerializableBase>parent).__view
+        if view is not None:
+            step = view.plan.field_step(self.__index)
+            return self.view_value(view, view.base + step.offset)
+
+        value = (<SerializableBase>parent).__values[self.__index]
+        return self.__default if value is None else value
+
+    def __set__(self, parent, value):
+        cdef ViewState view = (<SerializableBase>parent).__view
+        cdef step_t * step
+        cdef bytes data
+        cdef unsigned char * buff
+
+        if value is None:
+            value = self.__default
+        data = self.checked(value)
+
+        if view is not None:
+            step = view.plan.field_step(self.__index)
+            buff = view.writable_data() + step.offset
+            memcpy(buff, <const char *>data, len(data))
+            memset(buff + len(data), 0, <size_t>self.length - len(data))
+        elif isinstance(value, (bytearray, memoryview)):
+            # don't hold on to mutable buffers
+            (<SerializableBase>parent).__values[self.__index] = data
+        else:
+            (<SerializableBase>parent).__values[self.__index] = value
+
+    cdef object decode(self, const unsigned char * data, Py_ssize_t length):
+        return PyBytes_FromStringAndSize(<const char *>data, length)
+
+    cdef bytes encode(self, object value):
+        if isinstance(value, bytes):
+            return value
+        elif isinstance(value, (bytearray, memoryview)):
+            return bytes(value)
+        raise TypeError("'{}' must be bytes, given '{}'".format(self.__name, value.__class__.__name__))
+
+    cdef object view_value(self, ViewState view, Py_ssize_t offset):
+        # the memoryview keeps the buffer exported, like the view does
+        return memoryview(<object>view.buffer.view.obj).cast('B')[offset:offset + <Py_ssize_t>self.length]
+
+    cdef bytes checked(self, object value):
+        """Encoded value, raises ValueError if it doesn't fit the fixed length"""
+        cdef bytes data = self.encode(value)
+        if self.length is not None and len(data) > self.length:
+            raise ValueError("'{}' holds at most {} bytes, given {}".format(self.__name, self.length, len(data)))
+        return data
+
+    cdef Py_ssize_t _count(self, const unsigned char * bindata, Py_ssize_t length, uint32_t * offset, bytes byte_order) except -1:
+        """Reads the count field, raises TruncatedError if it or the data run past length"""
+        cdef Py_ssize_t count
+        if offset[0] + self.__count.size > length:
+            raise TruncatedError(self.__name, offset[0] + self.__count.size, length)
+        if self.__count.swapped(byte_order):
+            count = make_object_from_variant(self.__count._unpacker_swap(bindata, offset))
+        else:
+            count = make_object_from_variant(self.__count._unpacker(bindata, offset))
+        if count < 0:
+            raise ValueError("'{}' has a negative count, {}".format(self.__name, count))
+        if offset[0] + count > length:
+            raise TruncatedError(self.__name, offset[0] + count, length)
+        return count
+
+    cdef object _unpack(self, const unsigned char * bindata, Py_ssize_t length, uint32_t * offset, bytes byte_order):
+        """Decodes the counted value at bindata + offset"""
+        cdef Py_ssize_t count = self._count(bindata, length, offset, byte_order)
+        cdef object value = self.decode(bindata + offset[0], count)
+        offset[0] += count
+        return value
+
+    cdef Py_ssize_t _measure(self, const unsigned char * bindata, Py_ssize_t length, Py_ssize_t offset, bytes byte_order) except -2:
+        """Offset following the counted value at offset, -1 if length is too short to tell"""
+        cdef uint32_t position = offset
+        cdef Py_ssize_t count
+        if offset + self.__count.size > length:
+            return -1
+        if self.__count.swapped(byte_order):
+            count = make_object_from_variant(self.__count._unpacker_swap(bindata, &position))
+        else:
+            count = make_object_from_variant(self.__count._unpacker(bindata, &position))
+        if count < 0:
+            raise ValueError("'{}' has a negative count, {}".format(self.__name, count))
+        return position + count
+
+    cdef Py_ssize_t _sizeof(self, object value, bytes byte_order) except -1:
+        return self.__count.size + len(self.encode(value))
+
+    cdef int _pack(self, unsigned char * buff, uint32_t * offset, object value, bytes byte_order) except -1:
+        cdef bytes data = self.checked(value)
+        cdef Py_ssize_t length = len(data)
+        if self.length is None:
+            if self.__count.swapped(byte_order):
+                self.__count._packer_swap(buff, offset, length)
+            else:
+                self.__count._packer(buff, offset, length)
+            memcpy(buff + offset[0], <const char *>data, length)
+            offset[0] += length
+        else:
+            memcpy(buff + offset[0], <const char *>data, length)
+            memset(buff + offset[0] + length, 0, <size_t>self.length - length)
+            offset[0] += <uint32_t>self.length
+
+
+cdef class string(bytes_):
+    """Text stored as bytes_ in an encoding
+
+    With strip_nulls (default) the null padding of fixed length strings is
+    removed when they're decoded.
+    """
+    cdef:
+        readonly object encoding
+        readonly bint   strip_nulls
+
+    def __cinit__(self, length=None, count=None, default=None, encoding='utf-8', strip_nulls=True):
+        self.encoding = encoding
+        self.strip_nulls = strip_nulls
+        self.__default = '' if default is None else default
+
+    cdef object decode(self, const unsigned char * data, Py_ssize_t length):
+        cdef object text = PyBytes_FromStringAndSize(<const char *>data, length).decode(self.encoding)
+        if self.strip_nulls:
+            return text.rstrip('\x00')
+        return text
+
+    cdef bytes encode(self, object value):
+        if isinstance(value, str):
+            return value.encode(self.encoding)
+        raise TypeError("'{}' must be str, given '{}'".format(self.__name, value.__class__.__name__))
+
+    cdef object view_value(self, ViewState view, Py_ssize_t offset):
+        return self.decode(<const unsigned char *>view.buffer.view.buf + offset, <Py_ssize_t>self.length)
+
+
 native = b'='
 little_endian = b'<'
 big_endian = b'>'
 network = b'!'
 
+cdef uint16_t _byte_order_probe = 1
+cdef bytes host_byte_order = little_endian if (<uint8_t *>&_byte_order_probe)[0] == 1 else big_endian
+
+cdef bytes resolve_byte_order(object byte_order):
+    """Normalizes a byte order to little_endian or big_endian, None meaning native"""
+    if byte_order is None or byte_order == native:
+        return host_byte_order
+    elif byte_order == little_endian:
+        return little_endian
+    elif byte_order == big_endian or byte_order == network:
+        return big_endian
+    raise ValueError("Unrecognized byte order: {!r}".format(byte_order))
+
+# numpy type kinds for struct format characters, the width comes from the field size
+_numpy_kinds = {
+    b'x': 'u', b'c': 'u', b'b': 'i', b'B': 'u', b'?': 'b',
+    b'h': 'i', b'H': 'u', b'i': 'i', b'I': 'u', b'l': 'i', b'L': 'u',
+    b'q': 'i', b'Q': 'u', b'f': 'f', b'd': 'f'
+}
+
+# array.array typecode for each numpy kind and size, used to store arrays of primitive fields
+_array_typecodes = {}
+for _typecode in 'bBhHiIlLqQfd':
+    _array_typecodes.setdefault((_numpy_kinds[_typecode.encode()], array.array(_typecode).itemsize), _typecode)
+
+cdef object numpy_dtype_of(object cls, bytes byte_order=None):
+    """Builds the numpy dtype matching the binary layout of a SerializableObject class"""
+    import numpy
+
+    if cls._byte_order is not None or byte_order is None:
+        byte_order = resolve_byte_order(cls._byte_order)
+
+    fields = []
+    for field_name in cls._field_order:
+        field = cls.__dict__[field_name]
+        if isinstance(field, none):
+            raise NotImplementedError('{} has NoneType fields that must be implemented in a subclass'.format(cls.__name__))
+        elif isinstance(field, SerializableField):
+            fields.append((field_name, numpy_field_dtype(<SerializableField>field, byte_order)))
+        elif isinstance(field, SerializableObjectBase):
+            fields.append((field_name, numpy_dtype_of(field.__class__, byte_order)))
+        elif isinstance(field, bytes_) and (<bytes_>field).length is not None:
+            fields.append((field_name, 'S{}'.format((<bytes_>field).length)))
+        elif isinstance(field, SerializableArray) and isinstance((<SerializableArray>field).__count, int):
+            element = (<SerializableArray>field).__element_t
+            if isinstance(element, SerializableField):
+                fields.append((field_name, numpy_field_dtype(<SerializableField>element, byte_order), ((<SerializableArray>field).__count,)))
+            else:
+                fields.append((field_name, numpy_dtype_of(element.__class__, byte_order), ((<SerializableArray>field).__count,)))
+        else:
+            raise TypeError("'{}' in {} is variable length and has no numpy dtype".format(field_name, cls.__name__))
+    return numpy.dtype(fields)
+
+cdef object numpy_field_dtype(SerializableField field, bytes byte_order):
+    if field.__format == b'?':
+        return '?'
+    if field.byte_order is not None:
+        byte_order = field.byte_order
+    return byte_order.decode() + _numpy_kinds[field.__format] + str(field.size)
+
+# passed to SerializableObject.__new__ when the caller sets __values itself
+cdef object NO_VALUES = object()
+
+
 cdef class SerializableBase(Serializeable):
     cdef:
         readonly bint __flat
-        public list __values
+        public object __values  # list of field values, array.array for arrays of primitive fields
+        ViewState __view    # set when fields are decoded lazily from a buffer, see SerializableObject.view
+        list __children     # objects returned for nested fields, by field index
+        list __decoded      # (stored value, getter output) of cached fields, by field index
+
+    cdef inline object cached_child(self, uint64_t index, object values):
+        """Object returned earlier for the field at index, None if there's none still bound to values"""
+        cdef SerializableBase child
+        if self.__children is None:
+            return None
+        child = self.__children[index]
+        if child is not None and child.__values is values:
+            return child
+        return None
+
+    cdef inline void cache_child(self, uint64_t index, SerializableBase child):
+        if self.__children is None:
+            self.__children = [None] * len(self.__values)
+        self.__children[index] = child
+
+    cdef inline object cached_decoded(self, uint64_t index, object stored):
+        """Getter output saved for the field at index, NO_VALUES unless it was made from stored"""
+        cdef tuple entry
+        if self.__decoded is None:
+            return NO_VALUES
+        entry = self.__decoded[index]
+        if entry is not None and entry[0] is stored:
+            return entry[1]
+        return NO_VALUES
+
+    cdef inline void cache_decoded(self, uint64_t index, object stored, object value):
+        if self.__decoded is None:
+            self.__decoded = [None] * len(self.__values)
+        self.__decoded[index] = (stored, value)
+
+cdef class SerializableObjectBase(SerializableBase):
+    """Extension type behind SerializableObject, which is what structures subclass"""
+    cdef bint __pooled      # True while the object waits in its class's pool, see acquire
+    cdef bytearray __frame  # record kept for _keep_packed, see packed_view
+    cdef object __frame_view    # read-only memoryview of __frame
+    cdef list __packed      # values __frame was packed from, see shadow_of
 
-cdef class SerializableObject(SerializableBase):
     __slots__ = ()
+    _byte_order = None      # byte order of the fields, None inherits the enclosing object's or is native
+    _validation = 'on_set'  # when field validators run: 'on_set', 'on_pack' or 'never'
+    _pool_size = 64         # released objects kept for acquire
+    _keep_packed = False    # pack rewrites only the changed fields of a record kept by the object
     # __flat = True           # boolean flag indicating if size is reportable a-priori, assumed true until shown to be not
     # _partial_class = False # flag indicating child fields have been defined, but not as readable type
 
     def __cinit__(self, *args, **kargs):
-        cdef uint32_t argc = len(args)
-        cdef uint32_t kargc = len(kargs)
-
-        if "_field_order" not in self.__class__.__dict__:
-            self.__class__._partial_class = False
-            self.__class__.__flat = True
-
-            is_subclass_of_base = SerializableObject in self.__class__.__bases__
-
-            # migrate any superclass fields into subclass
-            if not is_subclass_of_base:
-                _base = self.__class__.__bases__[0]
-                _base() # create an instance to force creation of _field_order
-                for key in _base._field_order:
-                    if key not in self.__class__.__dict__:
-                        setattr(self.__class__, key, _base.__dict__[key])
-
-                # adopt parent's field order
-                self.__class__._field_order = _base._field_order
-
-                # ensure attributes are included in _field_order
-                for key, attr in self.__class__.__dict__.items():
-                    if issubclass(attr.__class__, Serializeable) and key not in _base._field_order:
-                        raise Exception("Class attribute '{}' is not not a sublass of StructBase, it's order cannot be determined.".format(key))
-
-            # update status based on fields
-            sz = 0
-            fields = []
-            for key, attr in self.__class__.__dict__.items():
-                if isinstance(attr, none):
-                    self.__class__._partial_class = True
-                if issubclass(attr.__class__, Serializeable):
-                    if not attr.__flat:
-                        self.__class__.__flat = False
-                    attr.SetName(key)
-                    fields.append((key, attr.__id))
-                    if not isinstance(attr, none):
-                        sz += attr.size
-
-            self.__class__._size = sz
-
-            # we'll need to make the _field_order if we don't have a parent that already figured it out
-            if is_subclass_of_base:
-                # sort by id
-                fields = sorted(fields, key=lambda item: item[1])
-                # grab names
-                self.__class__._field_order = []
-                for i, (field_name, creation__index) in enumerate(fields):
-                    self.__class__._field_order.append(field_name)
-
-            # update field indexes
-            for i, field_name in enumerate(self.__class__._field_order):
-                self.__class__.__dict__[field_name].SetIndex(i)
-        
-        elif self.__class__._partial_class:
+        cdef Schema schema = type(self)._schema
+
+        if len(args) == 1 and args[0] is NO_VALUES:
+            return
+        elif schema is None:
+            raise TypeError("SerializableObject has no fields, subclass it to declare them")
+        elif schema.partial:
             raise NotImplementedError('{} has NoneType fields that must be implemented in a subclass'.format(self.__class__.__name__))
 
+        # check for binary data
+        if len(args) == 1 and isinstance(args[0], binary_types):
+            self.unpack_with(schema.plan, args[0])
+            return
+
+        self.__values = schema.new_values()
+        if len(args) > 0 or len(kargs) > 0:
+            self.assign(schema, args, kargs)
+
+    cdef int assign(self, Schema schema, tuple args, dict kargs) except -1:
+        """Sets fields from constructor arguments, the rest keep their defaults"""
         # handle special cases where list or dict used
-        if argc == 1:
+        if len(args) == 1:
             if isinstance(args[0], (list, tuple)):
-                args = args[0]
+                args = tuple(args[0])
             elif isinstance(args[0], dict):
                 kargs = args[0]
-                args=[]
-      
-        # check for binary data
-        if len(args) == 1 and isinstance(args[0], string_types + (memoryview, type(b''))):
-            self.unpack(args[0])
-        elif len(args) > 0 or len(kargs) > 0:
-            self.__values = []
-            for i, field_name in enumerate(self.__class__._field_order):
-                self.__values.append(None)
-                self.__setattr__(field_name, None)
-                # assign order parameter and defaults for remainder
-                if i < len(args):
-                    self.__setattr__(field_name, args[i])
-
-            if len(kargs) > 0:
-                self.update(kargs)
-        else:
-            self.__values = []
-            # no information to populate, need to fill up with empty data just in case
-            for field_name in self.__class__._field_order:
-                self.__values.append(None)
-                self.__setattr__(field_name, None)
+                args = ()
+
+        # assign order parameter
+        for field_name, value in zip(schema.field_order, args):
+            setattr(self, field_name, value)
+
+        if len(kargs) > 0:
+            self.update(kargs)
 
     def AddSetter(self, func, field_name):
         if field_name in self.__class__._field_order:
@@ -386,32 +880,54 @@ cdef class SerializableObject(SerializableBase):
         else:
             raise AttributeError("{} is not an attribute of {}".format(field_name, self.__class__.__name__))
 
-    cdef inline void check_container(self, Serializeable parent, uint64_t index):
+    cdef inline void check_container(self, SerializableBase parent, uint64_t index):
         """Checks that an appropriate empty value had been set for this field in it's parent"""
-        cdef int i, n = self.__len__()
         if parent.__values[index] is None:
-            # hasn't been initialized in parent, set all values to none
-            parent.__values[index] = []
-            for i in range(n):
-                parent.__values[index].append(None)
+            # hasn't been initialized in parent, fill with defaults
+            parent.__values[index] = (<Schema>self.__class__._schema).new_values()
 
     def __get__(self, parent, parent_type):
         if parent is None:
             return self
+        elif (<SerializableBase>parent).__view is not None:
+            return (<SerializableBase>parent).__view.child(self.__class__, self.__index)
         else:
             return self.get_by_index(parent, self.__index)
 
     def __set__(self, parent, value):
-        self.set_by_index(parent, self.__index, value)
-
-    cdef inline object get_by_index(self, Serializeable parent, uint64_t index):
-        # kansas city shuffle
-        # retrieve values from parent, for now we'll masquerade as this parent's child
-        self.check_container(parent, index)
-        self.__values = parent.__values[index]
-        return self
+        cdef ViewState view = (<SerializableBase>parent).__view
+        cdef step_t * step
+        cdef uint32_t offset
+        if view is None:
+            self.set_by_index(parent, self.__index, value)
+        elif value is None:
+            return
+        elif issubclass(value.__class__, self.__class__):
+            step = view.plan.field_step(self.__index)
+            offset = step.offset
+            plan_of(self.__class__, <bytes>step.byte_order)._pack(view.writable_data(), &offset, container_of(value))
+        else:
+            raise TypeError("'{}' must be of type '{}', given '{}'".format(self.__name, self.__class__.__name__, value.__class__.__name__))
 
-    cdef inline int set_by_index(self, Serializeable parent, uint64_t index, object value) except 1:
+    cdef inline object get_by_index(self, SerializableBase parent, uint64_t index):
+        """Object of this class bound to the values of the field at index, one per parent"""
+        cdef object child
+        cdef object values = parent.__values[index]
+        if values is None:
+            values = parent.__values[index] = (<Schema>self.__class__._schema).new_values()
+        child = parent.cached_child(index, values)
+        if child is None:
+            child = self.bind(values)
+            parent.cache_child(index, child)
+        return child
+
+    cdef inline SerializableObjectBase bind(self, list values):
+        """Object of this class using values as its storage"""
+        cdef SerializableObjectBase obj = self.__class__.__new__(self.__class__, NO_VALUES)
+        obj.__values = values
+        return obj
+
+    cdef inline int set_by_index(self, SerializableBase parent, uint64_t index, object value) except 1:
         self.check_container(parent, index)
         if value is None: return 0
         if issubclass(value.__class__, self.__class__):
@@ -423,6 +939,10 @@ cdef class SerializableObject(SerializableBase):
     def __setitem__(self, key, value):
         if isinstance(key, string_types):
             if '.' in key:
+                path = lookup_path(type(self), key)
+                if path is not None:
+                    (<FieldPath>path).set(self, value)
+                    return
                 field_names = key.split('.')
                 obj = self.__getattribute__(field_names[0])
                 for field_name in field_names[1:-1]:
@@ -445,6 +965,10 @@ cdef class SerializableObject(SerializableBase):
     def __getitem__(self, key):
         if isinstance(key, string_types):
             if '.' in key:
+                path = lookup_path(type(self), key)
+                if path is not None:
+                    return (<FieldPath>path).get(self)
+                # not all fields, e.g. computed attributes
                 _field_names = key.split('.')
                 obj = self.__getattribute__(_field_names[0])
                 for _field_name in _field_names[1:]:
@@ -463,7 +987,7 @@ cdef class SerializableObject(SerializableBase):
                 field = self.__class__.__dict__[field_name]
                 if issubclass(field.__class__, SerializableField):
                     result.append(field.__get__(self, self.__class__))
-                elif issubclass(field.__class__, SerializableObject):
+                elif issubclass(field.__class__, SerializableObjectBase):
                     result.append(field)
             return result
         else:
@@ -494,55 +1018,363 @@ cdef class SerializableObject(SerializableBase):
     def items(self):
         return zip(self.__class__._field_order, self.values())
 
-    def unpack(self, bindata):
-        cdef uint32_t offset
-        self.__values = []
-        self._unpack(bindata, &offset, self.__values)
-        # self._size = offset
+    def to_tuple(self, bint getters=False):
+        """Tuple of the field values in packing order, with the fields of nested objects in line
+
+        Values are as stored, or as read through the fields when getters is
+        set. Arrays are lists, of tuples for arrays of objects.
+        """
+        return tuple(plan_of(type(self))._leaves(container_of(self), getters, EXPORT_TUPLE, None))
+
+    def to_dict(self, bint flatten=True, str sep='.', bint getters=False):
+        """Dict of the field values, see to_tuple
+
+        With flatten the fields of nested objects are keyed by their path,
+        e.g. 'body.northwest.x', otherwise nested objects are dicts. Arrays
+        of objects are lists of dicts.
+        """
+        cdef Plan plan = plan_of(type(self))
+        if flatten:
+            return plan._flat_dict(container_of(self), getters, sep)
+        return plan._nested_dict(container_of(self), getters)
+
+    @classmethod
+    def from_dict(cls, dict data, str sep='.'):
+        """Object made from a dict like to_dict gives, nested or flattened with sep
+
+        Values go through the setters and validators of their fields as they
+        do when passed to the constructor.
+        """
+        cdef SerializableObjectBase obj = cls.__new__(cls, NO_VALUES)
+        obj.__values = element_values(obj, nest_keys(data, sep))
+        return obj
+
+    @classmethod
+    def decode_records(cls, buffer, bint getters=False, Py_ssize_t offset=0):
+        """List of the to_tuple of every record following offset in buffer
+
+        Records of classes without arrays are read straight into tuples,
+        without creating objects. Raises EOFError if the buffer ends part
+        way through a record.
+        """
+        return record_tuples(cls, plan_of(cls), buffer, getters, offset)
 
-    cdef int _unpack(self, const unsigned char * bindata, uint32_t * offset, list container) except -1:
-        cdef str field_name
-        cdef object field
-        cdef list _field_list = self.__class__._field_order
-        
-        for field_name in _field_list:
-            field = self.__class__.__dict__[field_name]
-
-            if issubclass(field.__class__, SerializableField):
-                container.append(make_object_from_variant((<SerializableField>field)._unpacker(bindata, offset)))
-            elif issubclass(field.__class__, SerializableObject):
-                container.append([])
-                SerializableObject._unpack(field, bindata, offset, container[-1])
-            elif issubclass(field.__class__, SerializableArray):
-                container.append([])
-                SerializableArray._unpack(field, bindata, offset, container[-1], self)
-            else:
-                raise Exception("Attempted to use unknown Serializeable ({}) to unpack.".format(type(field)))
+    def unpack(self, bindata):
+        """Decodes the fields from the start of bindata (any bytes-like object)
+
+        Returns the number of bytes consumed. Raises TruncatedError if
+        bindata ends before the last field.
+        """
+        return self.unpack_with(plan_of(type(self)), bindata)
+
+    cdef Py_ssize_t unpack_with(self, Plan plan, object bindata) except -1:
+        """unpack with the plan of the object's class"""
+        cdef Py_buffer view
+        cdef uint32_t offset = 0
+        cdef probe_t probe
+        cdef bint timed = INSTRUMENTED
+        if timed:
+            probe = start_probe()
+        self.__view = None
+        self.__values = [None] * plan.width
+        PyObject_GetBuffer(bindata, &view, PyBUF_SIMPLE)
+        try:
+            plan._unpack(<const unsigned char *>view.buf, view.len, &offset, self.__values, self)
+        finally:
+            PyBuffer_Release(&view)
+        if timed:
+            stop_probe(&probe, type(self), 'unpack', offset)
+        return offset
+
+    def unpack_into(self, buffer, Py_ssize_t offset=0):
+        """Decodes the record at offset in buffer into the object's existing storage
+
+        The lists of nested objects and arrays are overwritten rather than
+        replaced when their shapes match, so anything sharing them, like the
+        objects returned for nested fields, sees the new values. Returns the
+        number of bytes consumed. Raises TruncatedError if buffer ends before
+        the last field, leaving the object partly decoded.
+        """
+        cdef Py_buffer view
+        cdef uint32_t position = offset
+        cdef Plan plan = plan_of(type(self))
+        cdef probe_t probe
+        cdef bint timed = INSTRUMENTED
+        if timed:
+            probe = start_probe()
+        if self.__view is not None or self.__values is None or len(self.__values) != plan.width:
+            self.__view = None
+            self.__values = [None] * plan.width
+        PyObject_GetBuffer(buffer, &view, PyBUF_SIMPLE)
+        try:
+            if offset < 0 or offset > view.len:
+                raise ValueError("offset {} is outside the buffer of {} bytes".format(offset, view.len))
+            plan._unpack(<const unsigned char *>view.buf, view.len, &position, self.__values, self, True)
+        finally:
+            PyBuffer_Release(&view)
+        if timed:
+            stop_probe(&probe, type(self), 'unpack', position - offset)
+        return position - offset
+
+    @classmethod
+    def acquire(cls, buffer=None, Py_ssize_t offset=0):
+        """Object from the pool of released objects of the class, or a new one
+
+        When buffer is given the record at offset is decoded into it with
+        unpack_into. Pass the object to release once it's no longer needed.
+        """
+        cdef SerializableObjectBase obj
+        cdef list pool = cls._pool
+        if pool:
+            obj = pool.pop()
+            obj.__pooled = False
+        else:
+            obj = cls()
+        if buffer is not None:
+            obj.unpack_into(buffer, offset)
+        return obj
+
+    def release(self):
+        """Returns the object to the pool of its class for acquire, it mustn't be used afterwards"""
+        cdef list pool = type(self)._pool
+        if self.__pooled:
+            raise ValueError("{} object was already released".format(type(self).__name__))
+        if len(pool) < type(self)._pool_size:
+            self.__pooled = True
+            pool.append(self)
+
+    cdef int _unpack(self, const unsigned char * bindata, Py_ssize_t length, uint32_t * offset, list container) except -1:
+        cdef Plan plan = plan_of(type(self))
+        container.extend([None] * plan.width)
+        plan._unpack(bindata, length, offset, container, self)
 
     def pack(self):
-        cdef bytearray buff = bytearray()
-        self._pack(buff, self.__values)
+        """Packs the object into a new bytearray
+
+        When the class sets _keep_packed the object keeps its record and
+        only the fields whose values were replaced since the previous call
+        are written again before it's copied, see packed_view.
+        """
+        cdef uint32_t offset = 0
+        cdef Plan plan = plan_of(type(self))
+        cdef Schema schema = type(self)._schema
+        cdef bytearray buff
+        cdef probe_t probe
+        cdef bint timed = INSTRUMENTED
+        cdef ViewState view = <ViewState>self.__view
+        if view is not None:
+            return PyByteArray_FromStringAndSize(<const char *>view.data(), view.plan.fixed_size)
+        if timed:
+            probe = start_probe()
+        if schema.check_on_pack:
+            check_values(schema, self.__values)
+        if schema.keep_packed:
+            buff = self.repack(plan, schema)
+            offset = len(buff)
+            buff = PyByteArray_FromStringAndSize(PyByteArray_AS_STRING(buff), offset)
+        else:
+            buff = PyByteArray_FromStringAndSize(NULL, plan._sizeof(self.__values))
+            plan._pack(<unsigned char *>PyByteArray_AS_STRING(buff), &offset, self.__values)
+        if timed:
+            stop_probe(&probe, type(self), 'pack', offset)
         return buff
 
-    cdef int _pack(self, bytearray buff, list container) except -1:
-        cdef str field_name
-        cdef object field
-        cdef list _field_list = self.__class__._field_order
-        
-        for field_name in _field_list:
-            field = self.__class__.__dict__[field_name]
-
-            if container[field.__index] is None:
-                raise Exception("{} not set".format(field_name))
-
-            if issubclass(field.__class__, SerializableField):
-                (<SerializableField>field)._packer(buff, container[field.__index])
-            elif issubclass(field.__class__, SerializableObject):
-                SerializableObject._pack(field, buff, container[field.__index])
-            elif issubclass(field.__class__, SerializableArray):
-                SerializableArray._pack(field, buff, container[field.__index])
-            else:
-                raise Exception("Attempted to use unknown Serializeable ({}) to unpack.".format(type(field)))
+    def packed_view(self):
+        """Read-only memoryview of the record kept by a _keep_packed class, brought up to date
+
+        Nothing is copied, so the record seen through the view changes with
+        the next pack or packed_view call. Use it, e.g. send it, before then.
+        The same view is returned until the size of the record changes.
+        """
+        cdef Plan plan = plan_of(type(self))
+        cdef Schema schema = type(self)._schema
+        if not schema.keep_packed:
+            raise TypeError("{} doesn't keep its packed record, set _keep_packed".format(type(self).__name__))
+        if self.__view is not None:
+            return memoryview(self.pack()).toreadonly()
+        if schema.check_on_pack:
+            check_values(schema, self.__values)
+        self.repack(plan, schema)
+        return self.__frame_view
+
+    cdef bytearray repack(self, Plan plan, Schema schema):
+        """Brings the record kept for _keep_packed up to date"""
+        cdef uint32_t offset = 0
+        cdef Py_ssize_t size = plan._sizeof(self.__values)
+        cdef bytearray buff = self.__frame
+        if buff is not None and len(buff) == size:
+            plan._repack(<unsigned char *>PyByteArray_AS_STRING(buff), self.__values, self.__packed)
+            return buff
+        buff = PyByteArray_FromStringAndSize(NULL, size)
+        plan._pack(<unsigned char *>PyByteArray_AS_STRING(buff), &offset, self.__values)
+        self.__packed = shadow_of(schema, self.__values)
+        self.__frame = buff
+        self.__frame_view = memoryview(buff).toreadonly()
+        return buff
+
+    def validate(self):
+        """Runs the validators of every field, including those of nested objects and arrays"""
+        check_values(type(self)._schema, container_of(self))
+
+    def __reduce__(self):
+        # pickled as the packed record, e.g. to pass objects between processes
+        return (type(self), (bytes(self.pack()),))
+
+    def pack_into(self, buffer, Py_ssize_t offset=0):
+        """Packs into a writable buffer (bytearray, memoryview, mmap) starting at offset
+
+        Returns the number of bytes written.
+        """
+        cdef Py_buffer view
+        cdef uint32_t position = 0
+        cdef Plan plan = plan_of(type(self))
+        cdef Py_ssize_t size = plan._sizeof(container_of(self))
+        cdef probe_t probe
+        cdef bint timed = INSTRUMENTED
+        if timed:
+            probe = start_probe()
+
+        if (<Schema>type(self)._schema).check_on_pack:
+            check_values(type(self)._schema, container_of(self))
+        PyObject_GetBuffer(buffer, &view, PyBUF_WRITABLE)
+        try:
+            if offset < 0 or offset + size > view.len:
+                raise ValueError("pack_into requires a buffer of at least {} bytes for packing {} bytes at offset {} (actual buffer size is {})".format(offset + size, size, offset, view.len))
+            plan._pack(<unsigned char *>view.buf + offset, &position, container_of(self))
+        finally:
+            PyBuffer_Release(&view)
+        if timed:
+            stop_probe(&probe, type(self), 'pack', size)
+        return size
+
+    cdef int _pack(self, unsigned char * buff, uint32_t * offset, list container) except -1:
+        plan_of(type(self))._pack(buff, offset, container)
+
+    @classmethod
+    def numpy_dtype(cls):
+        """numpy structured dtype matching the binary layout of this class"""
+        return numpy_dtype_of(cls)
+
+    @classmethod
+    def unpack_many(cls, buffer, count=None, Py_ssize_t offset=0):
+        """Decodes consecutive records from buffer into a numpy structured array
+
+        The array shares memory with buffer. When count is None every
+        complete record following offset is decoded.
+        """
+        import numpy
+
+        dtype = numpy_dtype_of(cls)
+        if count is None:
+            count = (memoryview(buffer).nbytes - offset) // dtype.itemsize
+        return numpy.frombuffer(buffer, dtype=dtype, count=count, offset=offset)
+
+    @classmethod
+    def pack_many(cls, array):
+        """Packs a numpy structured array (or sequence of tuples) of records"""
+        import numpy
+
+        return bytearray(numpy.ascontiguousarray(array, dtype=numpy_dtype_of(cls)).data)
+
+    @classmethod
+    def view(cls, buffer, Py_ssize_t offset=0):
+        """Lazy view of the record at offset in buffer (bytes, bytearray, memoryview, mmap)
+
+        Fields are decoded when they are read, and assigning to a field
+        writes straight into the buffer if it is writable. Arrays are decoded
+        whenever they are accessed. Only classes without variable length
+        fields can be viewed.
+        """
+        return make_view(cls, plan_of(cls), BufferRef(buffer), offset)
+
+    @classmethod
+    def iter_unpack(cls, source, Py_ssize_t chunk_size=65536):
+        """Yields objects decoded one after another from a stream or buffer
+
+        source is either a bytes-like object or a binary stream with a
+        read (files, pipes, socket.makefile) or recv (sockets) method. Streams
+        are read chunk_size bytes at a time and only a partial record is
+        carried between reads, so memory use stays bounded. Objects are created
+        without calling __init__.
+        """
+        cdef Plan plan = plan_of(cls)
+        if hasattr(source, 'read') or hasattr(source, 'recv'):
+            return _iter_stream(cls, plan, source, chunk_size)
+        return _iter_buffer(cls, plan, source)
+
+    @classmethod
+    def unpack_batch(cls, buffers, threads=None):
+        """List of objects decoded from each of buffers, or from every record of a single buffer
+
+        Field values are decoded with the GIL released, split between up to
+        threads threads (default, the number of CPUs), and only then turned
+        into Python objects. Classes with arrays are decoded one at a time.
+        Objects are created without calling __init__.
+        """
+        cdef Plan plan = plan_of(cls)
+        if threads is None:
+            threads = os.cpu_count() or 1
+        elif threads < 1:
+            raise ValueError("threads must be at least 1, given {}".format(threads))
+
+        if plan.flat:
+            return decode_batch(cls, plan, buffers, threads)
+        elif PyObject_CheckBuffer(buffers):
+            return list(_iter_buffer(cls, plan, buffers))
+        return [decode_object_from(cls, plan, buffer) for buffer in buffers]
+
+    @classmethod
+    def compile_path(cls, path):
+        """FieldPath for a dotted path like 'extents.northwest.x', resolved once and cached
+
+        String keys to __getitem__ and __setitem__ share the cache.
+        """
+        return compiled_path(cls, path)
+
+    def extract(self, paths):
+        """Tuple of the values at each of paths, dotted strings or FieldPaths"""
+        cdef list compiled = compile_paths(type(self), paths)
+        return tuple([(<FieldPath>path).get(self) for path in compiled])
+
+    @classmethod
+    def extract_many(cls, buffer, paths, count=None, Py_ssize_t offset=0):
+        """List of tuples of the values at each of paths for consecutive records in buffer
+
+        When count is None every record following offset is read. Fields of
+        fixed size records are read straight from the buffer without
+        creating objects.
+        """
+        cdef list compiled = compile_paths(cls, paths)
+        cdef Plan plan = plan_of(cls)
+        cdef list records = []
+        cdef Py_buffer view
+        cdef Py_ssize_t i, available
+
+        for path in compiled:
+            if not (<FieldPath>path).direct():
+                break
+        else:
+            PyObject_GetBuffer(buffer, &view, PyBUF_SIMPLE)
+            try:
+                if offset < 0 or offset > view.len:
+                    raise ValueError("Offset {} outside the buffer of {} bytes".format(offset, view.len))
+                available = (view.len - offset) // plan.fixed_size if plan.fixed_size > 0 else 0
+                if count is None:
+                    count = available
+                elif count > available:
+                    raise ValueError("{} {} records need {} bytes at offset {}, the buffer holds {}".format(count, cls.__name__, count * plan.fixed_size, offset, view.len))
+                for i in range(count):
+                    records.append(tuple([(<FieldPath>path).read(<const unsigned char *>view.buf + offset + i * plan.fixed_size) for path in compiled]))
+            finally:
+                PyBuffer_Release(&view)
+            return records
+
+        # variable length records, or paths to objects and arrays, are decoded
+        for obj in itertools.islice(_iter_buffer(cls, plan, memoryview(buffer)[offset:]), count):
+            records.append(tuple([(<FieldPath>path).get(obj) for path in compiled]))
+        if count is not None and len(records) < count:
+            raise ValueError("Only {} of {} {} records in the buffer".format(len(records), count, cls.__name__))
+        return records
 
     def update(self, *args, **kargs):
         "Same functionality as dict.update(). "
@@ -567,10 +1399,362 @@ cdef class SerializableObject(SerializableBase):
             self.__setattr__(key,value)
 
 
+class SerializableObject(SerializableObjectBase):
+    """Base class of binary structures, fields are declared as class attributes
+
+    The layout of each subclass is worked out once, when the class is created.
+    """
+    __slots__ = ()
+    _schema = None
+
+    @classmethod
+    def __init_subclass__(cls, **kargs):
+        super(SerializableObject, cls).__init_subclass__(**kargs)
+        finalize_layout(cls)
+
+
+cdef int finalize_layout(object cls) except -1:
+    """Determines the field order and layout of a new SerializableObject subclass"""
+    cls._partial_class = False
+    cls.__flat = True
+
+    is_subclass_of_base = SerializableObject in cls.__bases__
+
+    # migrate any superclass fields into subclass
+    if not is_subclass_of_base:
+        _base = cls.__bases__[0]
+        for key in _base._field_order:
+            if key not in cls.__dict__:
+                setattr(cls, key, _base.__dict__[key])
+
+        # adopt parent's field order
+        cls._field_order = _base._field_order
+
+        # ensure attributes are included in _field_order
+        for key, attr in cls.__dict__.items():
+            if issubclass(attr.__class__, Serializeable) and key not in _base._field_order:
+                raise Exception("Class attribute '{}' is not not a sublass of StructBase, it's order cannot be determined.".format(key))
+
+    # update status based on fields
+    sz = 0
+    fields = []
+    for key, attr in cls.__dict__.items():
+        if isinstance(attr, none):
+            cls._partial_class = True
+        if issubclass(attr.__class__, Serializeable):
+            if not attr.__flat:
+                cls.__flat = False
+            attr.SetName(key)
+            if (<Serializeable>attr).owner is None:
+                (<Serializeable>attr).owner = cls
+            fields.append((key, attr.__id))
+            if not isinstance(attr, none):
+                sz += attr.size
+
+    cls._size = sz
+
+    # we'll need to make the _field_order if we don't have a parent that already figured it out
+    if is_subclass_of_base:
+        # sort by id
+        fields = sorted(fields, key=lambda item: item[1])
+        # grab names
+        cls._field_order = [field_name for field_name, creation__index in fields]
+
+    # update field indexes
+    for i, field_name in enumerate(cls._field_order):
+        cls.__dict__[field_name].SetIndex(i)
+
+    # compile the unpack/pack plan once the layout is known
+    if cls._partial_class:
+        cls._plan = None
+    else:
+        cls._plan = Plan(cls)
+    cls._schema = Schema(cls)
+    cls._paths = {}  # FieldPaths by dotted path, see compile_path
+    cls._pool = []   # released objects, see acquire
+
+
+cdef class Schema(object):
+    """Layout of a SerializableObject class, fixed when the class is created"""
+    cdef:
+        readonly tuple      field_order # field names in packing order
+        readonly tuple      offsets     # byte offset of each field, None after a variable length field
+        readonly Py_ssize_t size        # packed size, -1 when variable length
+        readonly bint       flat        # True when the size is known without the values
+        readonly bint       partial     # True while NoneType fields wait to be overloaded
+        readonly object     validation  # when validators run, see SerializableObject._validation
+        bint                check_on_set
+        bint                check_on_pack
+        bint                keep_packed # see SerializableObject._keep_packed
+        bint                primitive   # True when every field is a SerializableField
+        bint                plain       # see is_plain
+        uint64_t            plain_changes
+        readonly Plan       plan        # None when partial
+        list                defaults    # initial value of each field
+        list                objects     # (index, Schema) of nested object fields
+        list                arrays      # (index, SerializableArray) of array fields
+        list                primitives  # (index, SerializableField) of primitive fields
+
+    def __cinit__(self, cls):
+        cdef uint32_t index
+        cdef step_t * step
+
+        self.field_order = tuple(cls._field_order)
+        self.flat = cls.__flat
+        self.partial = cls._partial_class
+        self.plan = cls._plan
+        self.size = self.plan.fixed_size if self.plan is not None else -1
+        self.defaults = []
+        self.objects = []
+        self.arrays = []
+        self.primitives = []
+        self.primitive = True
+
+        self.validation = cls._validation
+        if self.validation not in VALIDATION_POLICIES:
+            raise ValueError("{}._validation must be one of {}, given {!r}".format(cls.__name__, ', '.join(VALIDATION_POLICIES), self.validation))
+        self.check_on_set = self.validation == 'on_set'
+        self.check_on_pack = self.validation == 'on_pack'
+        self.keep_packed = cls._keep_packed
+
+        offsets = []
+        for index, field_name in enumerate(self.field_order):
+            field = cls.__dict__[field_name]
+            if self.plan is not None and self.plan.field_step(index).fixed:
+                offsets.append(self.plan.field_step(index).offset)
+            else:
+                offsets.append(None)
+
+            if isinstance(field, SerializableField):
+                self.defaults.append((<SerializableField>field).__default)
+                self.primitives.append((index, field))
+            elif isinstance(field, bytes_):
+                self.defaults.append((<bytes_>field).__default)
+                self.primitive = False
+            else:
+                self.primitive = False
+                self.defaults.append(None)
+                if isinstance(field, SerializableObjectBase):
+                    self.objects.append((index, field.__class__._schema))
+                else:
+                    self.arrays.append((index, field))
+        self.offsets = tuple(offsets)
+        self.plain_changes = PIPELINE_CHANGES
+        self.plain = self.find_plain()
+
+    cdef bint is_plain(self):
+        """True when every field is primitive and nothing needs to run when they're set"""
+        if self.plain_changes != PIPELINE_CHANGES:
+            self.plain_changes = PIPELINE_CHANGES
+            self.plain = self.find_plain()
+        return self.plain
+
+    cdef bint find_plain(self):
+        cdef tuple item
+        if not self.primitive:
+            return False
+        for item in self.primitives:
+            if (<SerializableField>item[1]).__setters or (self.check_on_set and (<SerializableField>item[1]).__validators):
+                return False
+        return True
+
+    cdef list new_values(self):
+        """Values of a new instance, fields set to their defaults"""
+        cdef list values = self.defaults[:]
+        cdef tuple item
+        for item in self.objects:
+            values[<Py_ssize_t>item[0]] = (<Schema>item[1]).new_values()
+        for item in self.arrays:
+            values[<Py_ssize_t>item[0]] = (<SerializableArray>item[1]).new_container(())
+        return values
+
+
+VALIDATION_POLICIES = ('on_set', 'on_pack', 'never')
+
+
+cdef int check_values(Schema schema, list values) except -1:
+    """Runs the validators of the fields in values, and of nested objects and arrays"""
+    cdef tuple item
+    cdef SerializableArray array
+    for item in schema.primitives:
+        value = values[<Py_ssize_t>item[0]]
+        if value is not None and (<SerializableField>item[1]).__validators:
+            (<SerializableField>item[1]).validate(value)
+    for item in schema.objects:
+        if values[<Py_ssize_t>item[0]] is not None:
+            check_values(item[1], values[<Py_ssize_t>item[0]])
+    for item in schema.arrays:
+        array = item[1]
+        elements = values[<Py_ssize_t>item[0]]
+        if elements is None:
+            continue
+        if isinstance(array.__element_t, SerializableObjectBase):
+            for element in elements:
+                check_values(array.__element_t.__class__._schema, element)
+        elif isinstance(array.__element_t, SerializableField) and (<SerializableField>array.__element_t).__validators:
+            for element in elements:
+                (<SerializableField>array.__element_t).validate(element)
+    return 0
+
+
+cdef list shadow_of(Schema schema, list values):
+    """Copy of values, and of the values of nested objects, for Plan._repack"""
+    cdef list shadow = values[:]
+    cdef tuple item
+    for item in schema.objects:
+        if shadow[<Py_ssize_t>item[0]] is not None:
+            shadow[<Py_ssize_t>item[0]] = shadow_of(item[1], shadow[<Py_ssize_t>item[0]])
+    return shadow
+
+
+cdef class FieldPath(object):
+    """Dotted path to a field of a SerializableObject class, see SerializableObject.compile_path"""
+    cdef:
+        readonly object     cls
+        readonly object     path
+        readonly tuple      names
+        readonly object     offset  # byte offset in a record, None when it isn't fixed
+        tuple               indexes # field index at each level
+        SerializableField   leaf    # None unless the path ends at a primitive field
+        bint                check   # run the leaf's validators on set, from the policy of its class
+        Plan                plan
+        uint32_t            step    # step of the last field in plan
+
+    def __cinit__(self, cls, path):
+        cdef uint32_t step = 0
+        cdef list indexes = []
+        cdef object owner = cls
+        cdef object field = None
+
+        self.cls = cls
+        self.path = path
+        self.names = tuple(path.split('.'))
+        self.plan = cls._plan
+
+        for i, name in enumerate(self.names):
+            if i > 0:
+                if not isinstance(field, SerializableObjectBase):
+                    raise AttributeError("'{}' of {} is not a nested object".format(self.names[i - 1], owner.__name__))
+                owner = field.__class__
+            field = owner.__dict__.get(name)
+            if not isinstance(field, Serializeable):
+                raise AttributeError("'{}' is not a field of {}".format(name, owner.__name__))
+            indexes.append((<Serializeable>field).__index)
+            if self.plan is not None:
+                if i == 0:
+                    step = self.plan.fields[(<Serializeable>field).__index]
+                else:
+                    step = self.plan.child_step(step, (<Serializeable>field).__index)
+        self.indexes = tuple(indexes)
+        self.step = step
+
+        if isinstance(field, SerializableField):
+            self.leaf = field
+            self.check = (<Schema>owner._schema).check_on_set
+        self.offset = None
+        if self.plan is not None and self.plan.steps[step].fixed and self.plan.steps[step].kind not in (STEP_ARRAY, STEP_COUNTED):
+            self.offset = self.plan.steps[step].offset
+
+    def __repr__(self):
+        return "FieldPath({}, '{}')".format(self.cls.__name__, self.path)
+
+    cdef inline bint direct(self):
+        """True when the value can be read from a fixed size record without decoding it"""
+        return self.leaf is not None and self.offset is not None and self.plan.fixed_size >= 0
+
+    cdef inline object read(self, const unsigned char * record):
+        cdef uint32_t offset = self.plan.steps[self.step].offset
+        return self.leaf.decoded(make_object_from_variant(self.plan.steps[self.step].unpacker(record, &offset)))
+
+    cdef object walk(self, object obj, Py_ssize_t depth):
+        """Object reached by following the first depth names from obj"""
+        cdef Py_ssize_t i
+        for i in range(depth):
+            obj = getattr(obj, self.names[i])
+        return obj
+
+    cdef object values_of(self, SerializableObjectBase obj):
+        """Values list holding the leaf, None when it has to be reached through attributes"""
+        cdef object values = obj.__values
+        cdef Py_ssize_t i
+        if obj.__view is not None or self.leaf is None:
+            return None
+        for i in range(len(self.indexes) - 1):
+            values = values[<Py_ssize_t>self.indexes[i]]
+            if values is None:
+                return None
+        return values
+
+    cpdef object get(self, obj):
+        """Value at the path in obj"""
+        cdef object values
+
+        if not isinstance(obj, self.cls):
+            raise TypeError("{} is for {} objects, given {}".format(self, self.cls.__name__, obj.__class__.__name__))
+
+        view = (<SerializableObjectBase>obj).__view
+        if view is not None and self.direct() and (<ViewState>view).plan is self.plan:
+            return self.read((<ViewState>view).data())
+        values = self.values_of(obj)
+        if values is not None:
+            return self.leaf.decoded(values[<Py_ssize_t>self.indexes[-1]])
+        return self.walk(obj, len(self.names))
+
+    cpdef set(self, obj, value):
+        """Sets the value at the path in obj"""
+        cdef object values
+
+        if not isinstance(obj, self.cls):
+            raise TypeError("{} is for {} objects, given {}".format(self, self.cls.__name__, obj.__class__.__name__))
+
+        values = self.values_of(obj)
+        if values is None:
+            setattr(self.walk(obj, len(self.names) - 1), self.names[-1], value)
+        elif value is None:
+            values[<Py_ssize_t>self.indexes[-1]] = self.leaf.__default
+        else:
+            values[<Py_ssize_t>self.indexes[-1]] = self.leaf.encoded(value, self.check)
+
+
+cdef FieldPath compiled_path(object cls, object path):
+    """FieldPath for path from the class's cache, compiled on first use"""
+    cdef dict cache = cls._paths
+    cdef object compiled = cache.get(path)
+    if compiled is None:
+        compiled = cache[path] = FieldPath(cls, path)
+    return <FieldPath>compiled
+
+
+cdef object lookup_path(object cls, object path):
+    """Like compiled_path, but None when path doesn't only name fields"""
+    cdef dict cache = cls._paths
+    cdef object compiled = cache.get(path, NO_VALUES)
+    if compiled is NO_VALUES:
+        try:
+            compiled = FieldPath(cls, path)
+        except AttributeError:
+            compiled = None
+        cache[path] = compiled
+    return compiled
+
+
+cdef list compile_paths(object cls, object paths):
+    cdef list compiled = []
+    for path in paths:
+        if isinstance(path, FieldPath):
+            if not issubclass(cls, (<FieldPath>path).cls):
+                raise TypeError("{} is for {} objects, not {}".format(path, (<FieldPath>path).cls.__name__, cls.__name__))
+            compiled.append(path)
+        else:
+            compiled.append(compiled_path(cls, path))
+    return compiled
+
+
 cdef class SerializableArray(SerializableBase):
     cdef:
         readonly Serializeable __element_t
         object __count
+        array.array __template  # empty typed storage for arrays of primitive fields, None otherwise
 
     def __cinit__(self, __element_t, count=None):
         self.__flat = False
@@ -582,47 +1766,124 @@ cdef class SerializableArray(SerializableBase):
 
         if not issubclass(__element_t.__class__, Serializeable):
             raise Exception("Not an instance of a class that subclasses Serializeable")
+        if isinstance(__element_t, bytes_):
+            raise TypeError("Arrays of {} aren't supported".format(__element_t.__class__.__name__))
 
         if self.__count is None:
             if not self.__element_t.__flat:
                 raise Exception("Unbounded size unsupported in SerializableArray for variable size type {}".format(__element_t.__class__.__name__))
 
-        self.__values = []
+        if isinstance(__element_t, SerializableField) and not isinstance(__element_t, none):
+            typecode = _array_typecodes.get((_numpy_kinds.get(__element_t.__format), __element_t.size))
+            if typecode is not None:
+                self.__template = array.array(typecode)
+
+        self.__values = self.new_container(())
+
+    cdef object new_container(self, object values):
+        """Storage for the elements, typed for primitive fields"""
+        if self.__template is not None:
+            return array.array(self.__template.typecode, values)
+        return list(values)
+
+    cdef SerializableArray bind(self, object values):
+        """Array of the same elements using values as its storage"""
+        cdef SerializableArray child = SerializableArray.__new__(SerializableArray, self.__element_t, self.__count)
+        child.__values = values
+        child.__name = self.__name
+        child.__index = self.__index
+        return child
 
     def __get__(self, parent, parent_type):
-        if parent is not None:
-            # kansas city shuffle
-            # retrieve values from parent, for now we'll masquerade as this parent's child
-            if parent.__values[self.__index] is None:
-                # hasn't been initialized in parent, set all values to none
-                # self.__set__(parent, None)
-                parent.__values[self.__index] = []
-            self.__values = parent.__values[self.__index]
-        return self
+        cdef ViewState view
+        cdef step_t * step
+        cdef uint32_t offset
+        cdef object values, child
+        if parent is None:
+            return self
+
+        view = (<SerializableBase>parent).__view
+        if view is not None:
+            # arrays are decoded on access, writing to them won't change the buffer
+            step = view.plan.field_step(self.__index)
+            offset = step.offset
+            return self.bind(self._unpack(view.data(), view.length(), &offset, parent, <bytes>step.byte_order))
+
+        # one array per parent, bound to the parent's storage for this field
+        values = (<SerializableBase>parent).__values[self.__index]
+        if values is None:
+            values = (<SerializableBase>parent).__values[self.__index] = self.new_container(())
+        child = (<SerializableBase>parent).cached_child(self.__index, values)
+        if child is None:
+            child = self.bind(values)
+            (<SerializableBase>parent).cache_child(self.__index, child)
+        return child
 
     def __set__(self, parent, value):
-        # create empty dict in parent
+        cdef ViewState view = (<SerializableBase>parent).__view
+        cdef step_t * step
+        cdef uint32_t offset
+        cdef object storage = self.storage_of(value)
+        if view is None:
+            (<SerializableBase>parent).__values[self.__index] = storage
+            return
+
+        # views only hold arrays of a fixed count, written in place
+        if len(storage) != self.__count:
+            raise ValueError("'{}' holds {} elements, given {}".format(self.__name, self.__count, len(storage)))
+        step = view.plan.field_step(self.__index)
+        offset = step.offset
+        self._pack(view.writable_data(), &offset, storage, <bytes>step.byte_order)
+
+    cdef object storage_of(self, object value):
+        """Element storage for a value assigned to the array"""
         if value is None:
-            self.__values = parent.__values[self.__index] = []
+            return self.new_container(())
         elif issubclass(value.__class__, self.__class__):
             # copy pointer to outside values
-            parent.__values[self.__index] = value.__values
+            return value.__values
+        elif self.__template is not None and isinstance(value, (list, tuple, array.array)):
+            if isinstance(value, array.array) and value.typecode == self.__template.typecode:
+                return value
+            return self.new_container(value)
         elif issubclass(value.__class__, list):
-            parent.__values[self.__index] = value
+            return value
         elif issubclass(value.__class__, tuple):
-            parent.__values[self.__index] = list(value)
-        else:
-            raise TypeError("'{}' must be of type '{}', given '{}'".format(self.__name, self.__class__.__name__, value.__class__.__name__))
+            return list(value)
+        raise TypeError("'{}' must be of type '{}', given '{}'".format(self.__name, self.__class__.__name__, value.__class__.__name__))
 
     def __len__(self):
         return len(self.__values)
 
+    def __getbuffer__(self, Py_buffer * buffer, int flags):
+        """Exports the typed storage of arrays of primitive fields, e.g. for numpy.asarray"""
+        if self.__template is None:
+            raise BufferError("Only arrays of primitive fields support the buffer protocol")
+        cdef Py_buffer view
+        PyObject_GetBuffer(self.__values, &view, flags)
+        buffer.buf = view.buf
+        buffer.len = view.len
+        buffer.itemsize = view.itemsize
+        buffer.readonly = view.readonly
+        buffer.ndim = view.ndim
+        buffer.format = view.format
+        buffer.shape = view.shape
+        buffer.strides = view.strides
+        buffer.suboffsets = view.suboffsets
+        buffer.internal = view.internal
+        # the storage's export is handed over whole, so releasing the view releases the storage's buffer
+        buffer.obj = self.__values
+        # drop the reference view.obj held, buffer.obj now holds its own
+        Py_DECREF(self.__values)
+
     def __getitem__(self, key):
         if isinstance(key, int):
             if issubclass(self.__element_t.__class__, SerializableField):
                 return (<SerializableField>self.__element_t).get_by_index(self, key)
-            elif issubclass(self.__element_t.__class__, SerializableObject):
-                return (<SerializableObject>self.__element_t).get_by_index(self, key)
+            elif issubclass(self.__element_t.__class__, SerializableObjectBase):
+                if self.__values[key] is None:
+                    self.__values[key] = (<Schema>self.__element_t.__class__._schema).new_values()
+                return (<SerializableObjectBase>self.__element_t).bind(self.__values[key])
         elif isinstance(key, slice):
             values = []
             for i in range(*key.indices(self.__len__())):
@@ -637,76 +1898,1506 @@ cdef class SerializableArray(SerializableBase):
             if key < self.__len__():
                 if issubclass(self.__element_t.__class__, SerializableField):
                     (<SerializableField>self.__element_t).set_by_index(self, key, value)
-                elif issubclass(self.__element_t.__class__, SerializableObject):
-                    (<SerializableObject>self.__element_t).set_by_index(self, key, value)
+                elif issubclass(self.__element_t.__class__, SerializableObjectBase):
+                    (<SerializableObjectBase>self.__element_t).set_by_index(self, key, value)
             else:
                 raise IndexError("Index: {} not in object".format(key))
         elif isinstance(key, slice):
             if issubclass(self.__element_t.__class__, SerializableField):
                 for i, index in enumerate(key.indices(self.__len__())):
                     (<SerializableField>self.__element_t).set_by_index(self, index, value)
-            elif issubclass(self.__element_t.__class__, SerializableObject):
+            elif issubclass(self.__element_t.__class__, SerializableObjectBase):
                 for i, index in enumerate(key.indices(self.__len__())):
-                    (<SerializableObject>self.__element_t).set_by_index(self, index, value)
+                    (<SerializableObjectBase>self.__element_t).set_by_index(self, index, value)
         else:
             raise Exception("Unrecognized index: {}".format(key))
 
     def append(self, *args, **kargs):
         if issubclass(self.__element_t.__class__, SerializableField):
-            self.__values.append(None)
+            self.__values.append(None if self.__template is None else 0)
             (<SerializableField>self.__element_t).set_by_index(self, self.__len__() - 1, args[0])
-        elif issubclass(self.__element_t.__class__, SerializableObject):
-            # TODO: this is ineficient, it creates a new descriptor for each item
-            obj = self.__element_t.__class__(*args,**kargs)
-            self.__values.append(obj.__values)
+        elif issubclass(self.__element_t.__class__, SerializableObjectBase):
+            if len(args) == 1 and not kargs:
+                self.__values.append(element_values(self.__element_t, args[0]))
+            else:
+                values = element_values(self.__element_t, args)
+                if kargs:
+                    (<SerializableObjectBase>self.__element_t).bind(values).update(kargs)
+                self.__values.append(values)
+
+    def extend(self, iterable):
+        """Appends each item of iterable
+
+        Object elements are written straight to storage from tuples, lists
+        or dicts of their fields, or taken from objects of the element class.
+        """
+        cdef SerializableField field
+        if isinstance(self.__element_t, SerializableObjectBase):
+            self.__values.extend([element_values(self.__element_t, item) for item in iterable])
+            return
+
+        field = <SerializableField>self.__element_t
+        if not field.__setters and not field.__validators:
+            self.__values.extend(iterable)
+        else:
+            self.__values.extend([field.encoded(value) for value in iterable])
+
+    def from_tuples(self, rows):
+        """New array of the same elements made from rows, e.g. points = Path.points.from_tuples(...)"""
+        cdef SerializableArray array = self.bind(self.new_container(()))
+        array.extend(rows)
+        return array
+
+    def from_numpy(self, values):
+        """New array of the same elements from a numpy array, structured for object elements"""
+        import numpy
+
+        cdef SerializableArray array
+        if self.__template is not None:
+            array = self.bind(self.new_container(()))
+            array.__values.frombytes(memoryview(numpy.ascontiguousarray(values, dtype=self.__template.typecode)).cast('B'))
+            if (<SerializableField>self.__element_t).__setters or (<SerializableField>self.__element_t).__validators:
+                return self.from_tuples(array.__values)
+            return array
+        # rows of a structured array as (nested) tuples
+        return self.from_tuples(numpy.asarray(values).tolist())
 
     property size:
+        """Packed size of the elements, excluding any count field"""
         def __get__(self):
+            cdef Plan plan
+            cdef Py_ssize_t size = 0
             if issubclass(self.__element_t.__class__, SerializableField):
                 return self.__element_t.size * self.__len__()
-            elif issubclass(self.__element_t.__class__, SerializableObject) and self.__element_t.__flat:
-                return self.__element_t.size * self.__len__()
-            else:
-                size = 0
-                for obj in self.__values:
-                    size += obj.size
-                return size
-
-    cdef int _unpack(self, const unsigned char * bindata, uint32_t * offset, list container, object parent) except -1:
+            plan = plan_of(self.__element_t.__class__)
+            if plan.flat:
+                return plan.size * self.__len__()
+            for values in self.__values:
+                size += plan._sizeof(values)
+            return size
+
+    cdef object _unpack(self, const unsigned char * bindata, Py_ssize_t length, uint32_t * offset, object parent, bytes byte_order, object storage=None):
+        """Decodes the array at bindata + offset, returns the element storage
+
+        storage, the array's current storage, is filled in place instead of
+        making a new one when it can hold the elements.
+        """
+        cdef probe_t probe
+        cdef uint32_t start = offset[0]
+        if not INSTRUMENTED:
+            return self._unpack_elements(bindata, length, offset, parent, byte_order, storage)
+        probe = start_probe()
+        storage = self._unpack_elements(bindata, length, offset, parent, byte_order, storage)
+        stop_probe(&probe, self, 'unpack', offset[0] - start)
+        return storage
+
+    cdef object _unpack_elements(self, const unsigned char * bindata, Py_ssize_t length, uint32_t * offset, object parent, bytes byte_order, object storage):
         cdef int i, count = 0
+        cdef Py_ssize_t element_size
+        cdef Plan plan = None
+        cdef list container, values
+        cdef array.array typed
+        cdef serializer_t unpacker
+
+        if issubclass(self.__element_t.__class__, SerializableField):
+            element_size = (<SerializableField>self.__element_t).size
+        else:
+            plan = plan_of(self.__element_t.__class__, byte_order)
+            element_size = plan.size if plan.flat else -1
 
         if self.__count is None:
-            count = len(bindata) - offset[0] - len(bindata) % self.__element_t.size
+            # unbounded, takes every complete element left in the buffer
+            count = (length - offset[0]) // element_size
         else:
             if isinstance(self.__count, SerializableField):
-                count = make_object_from_variant((<SerializableField>self.__count)._unpacker(bindata, offset))
+                if offset[0] + (<SerializableField>self.__count).size > length:
+                    raise TruncatedError(self.__name, offset[0] + (<SerializableField>self.__count).size, length)
+                if (<SerializableField>self.__count).swapped(byte_order):
+                    unpacker = (<SerializableField>self.__count)._unpacker_swap
+                else:
+                    unpacker = (<SerializableField>self.__count)._unpacker
+                count = make_object_from_variant(unpacker(bindata, offset))
             elif isinstance(self.__count, int):
                 count = self.__count
             else: # callable, i.e. lambda
                 count = self.__count(parent)
+            if count < 0:
+                raise ValueError("'{}' has a negative count, {}".format(self.__name, count))
 
-        if issubclass(self.__element_t.__class__, SerializableField):
+        # one check for the whole array when the elements are fixed size
+        if element_size >= 0 and offset[0] + element_size * count > length:
+            raise TruncatedError(self.__name, offset[0] + element_size * count, length)
+
+        if self.__template is not None:
+            # primitive elements are copied straight into typed storage
+            if isinstance(storage, array.array) and len(storage) == count and storage.typecode == self.__template.typecode:
+                typed = storage
+            else:
+                typed = array.clone(self.__template, count, False)
+            memcpy(typed.data.as_chars, bindata + offset[0], element_size * count)
+            offset[0] += element_size * count
+            if (<SerializableField>self.__element_t).swapped(byte_order):
+                typed.byteswap()
+            return typed
+
+        if type(storage) is list:
+            container = storage
+        else:
+            container = []
+        if plan is None:
+            if (<SerializableField>self.__element_t).swapped(byte_order):
+                unpacker = (<SerializableField>self.__element_t)._unpacker_swap
+            else:
+                unpacker = (<SerializableField>self.__element_t)._unpacker
+            del container[:]
             for i in range(count):
-                container.append(make_object_from_variant((<SerializableField>self.__element_t)._unpacker(bindata, offset)))
-        elif issubclass(self.__element_t.__class__, SerializableObject):
+                container.append(make_object_from_variant(unpacker(bindata, offset)))
+        else:
             for i in range(count):
-                container.append([])
-                SerializableObject._unpack(self.__element_t, bindata, offset, container[-1])
+                if i < len(container) and type(container[i]) is list and len(<list>container[i]) == plan.width:
+                    values = container[i]
+                else:
+                    values = [None] * plan.width
+                    if i < len(container):
+                        container[i] = values
+                    else:
+                        container.append(values)
+                plan._unpack(bindata, length, offset, values, parent, storage is not None)
+            del container[count:]
+        return container
+
+    cdef Py_ssize_t _fixed_size(self):
+        """Packed size when known from the declaration alone, otherwise -1"""
+        if not isinstance(self.__count, int):
+            return -1
+        if isinstance(self.__element_t, SerializableField):
+            return (<SerializableField>self.__element_t).size * self.__count
+        elif self.__element_t.__class__._plan is not None and (<Plan>self.__element_t.__class__._plan).flat:
+            return (<Plan>self.__element_t.__class__._plan).size * self.__count
+        return -1
+
+    cdef Py_ssize_t _measure(self, const unsigned char * bindata, Py_ssize_t length, Py_ssize_t offset, bytes byte_order) except -2:
+        """Offset following the array starting at offset, -1 if length is too short to tell"""
+        cdef Py_ssize_t i, size, count
+        cdef uint32_t position = offset
+        cdef Plan plan
+        cdef serializer_t unpacker
+
+        if isinstance(self.__count, SerializableField):
+            if offset + (<SerializableField>self.__count).size > length:
+                return -1
+            if (<SerializableField>self.__count).swapped(byte_order):
+                unpacker = (<SerializableField>self.__count)._unpacker_swap
+            else:
+                unpacker = (<SerializableField>self.__count)._unpacker
+            count = make_object_from_variant(unpacker(bindata, &position))
+            offset = position
+        elif isinstance(self.__count, int):
+            count = self.__count
+        else:
+            raise TypeError("The size of '{}' can't be determined without decoding it".format(self.__name))
+        if count < 0:
+            raise ValueError("'{}' has a negative count, {}".format(self.__name, count))
+
+        if isinstance(self.__element_t, SerializableField):
+            return offset + (<SerializableField>self.__element_t).size * count
+
+        plan = plan_of(self.__element_t.__class__, byte_order)
+        if plan.flat:
+            return offset + plan.size * count
+        for i in range(count):
+            size = plan._measure(bindata + offset, length - offset)
+            if size < 0:
+                return -1
+            offset += size
+        return offset
+
+    cdef Py_ssize_t _sizeof(self, object container, bytes byte_order) except -1:
+        cdef Py_ssize_t i, size = 0
+        cdef Plan plan
+
+        if isinstance(self.__count, SerializableField):
+            size += (<SerializableField>self.__count).size
 
-    cdef int _pack(self, bytearray buff, list container) except -1:
+        if issubclass(self.__element_t.__class__, SerializableField):
+            size += (<SerializableField>self.__element_t).size * len(container)
+        elif issubclass(self.__element_t.__class__, SerializableObjectBase):
+            plan = plan_of(self.__element_t.__class__, byte_order)
+            if plan.flat:
+                size += plan.size * len(container)
+            else:
+                for i in range(len(container)):
+                    size += plan._sizeof(container[i])
+        return size
+
+    cdef int _pack(self, unsigned char * buff, uint32_t * offset, object container, bytes byte_order) except -1:
+        cdef probe_t probe
+        cdef uint32_t start = offset[0]
+        if not INSTRUMENTED:
+            return self._pack_elements(buff, offset, container, byte_order)
+        probe = start_probe()
+        self._pack_elements(buff, offset, container, byte_order)
+        stop_probe(&probe, self, 'pack', offset[0] - start)
+
+    cdef int _pack_elements(self, unsigned char * buff, uint32_t * offset, object container, bytes byte_order) except -1:
         cdef int i, count = len(container)
+        cdef Py_ssize_t size
+        cdef Plan plan
+        cdef deserializer_t packer
 
         # if we're responsible for serializing the length we do it now
         if isinstance(self.__count, SerializableField):
-            (<SerializableField>self.__count)._packer(buff, count)
-       
-        if issubclass(self.__element_t.__class__, SerializableField):
+            if (<SerializableField>self.__count).swapped(byte_order):
+                packer = (<SerializableField>self.__count)._packer_swap
+            else:
+                packer = (<SerializableField>self.__count)._packer
+            packer(buff, offset, count)
+
+        if self.__template is not None and isinstance(container, array.array):
+            size = (<array.array>container).itemsize
+            memcpy(buff + offset[0], (<array.array>container).data.as_chars, size * count)
+            if (<SerializableField>self.__element_t).swapped(byte_order):
+                swap_elements(buff + offset[0], count, size)
+            offset[0] += size * count
+        elif issubclass(self.__element_t.__class__, SerializableField):
+            if (<SerializableField>self.__element_t).swapped(byte_order):
+                packer = (<SerializableField>self.__element_t)._packer_swap
+            else:
+                packer = (<SerializableField>self.__element_t)._packer
             for i in range(count):
-                (<SerializableField>self.__element_t)._packer(buff, container[i])
-        elif issubclass(self.__element_t.__class__, SerializableObject):
+                packer(buff, offset, container[i])
+        elif issubclass(self.__element_t.__class__, SerializableObjectBase):
+            plan = plan_of(self.__element_t.__class__, byte_order)
             for i in range(count):
-                SerializableObject._pack(self.__element_t, buff, container[i])
+                plan._pack(buff, offset, container[i])
         else:
             raise Exception("Attempted to use unknown Serializeable ({}) to unpack.".format(type(self.__element_t)))
 
 
+cdef list element_values(SerializableObjectBase element, object item):
+    """Storage for an element of element's class, from a tuple, list or dict of its fields or an object"""
+    cdef object cls = element.__class__
+    cdef Schema schema = cls._schema
+    cdef list values
+    cdef object field
+    cdef SerializableArray elements
+
+    if isinstance(item, cls):
+        return container_of(item)
+    elif isinstance(item, dict):
+        pairs = item.items()
+    elif isinstance(item, (tuple, list)):
+        if len(item) > len(schema.field_order):
+            raise TypeError("{} has {} fields, given {} values".format(cls.__name__, len(schema.field_order), len(item)))
+        if schema.is_plain() and len(item) == len(schema.field_order):
+            # nothing to convert, the values are stored as given
+            values = list(item)
+            if None in values:
+                values = [default if value is None else value for value, default in zip(values, schema.defaults)]
+            return values
+        pairs = zip(schema.field_order, item)
+    else:
+        raise TypeError("{} elements are made from tuples, lists, dicts or {} objects, given '{}'".format(cls.__name__, cls.__name__, item.__class__.__name__))
+
+    values = schema.new_values()
+    for name, value in pairs:
+        field = cls.__dict__.get(name)
+        if isinstance(field, SerializableField):
+            if value is None:
+                values[(<Serializeable>field).__index] = (<SerializableField>field).__default
+            else:
+                values[(<Serializeable>field).__index] = (<SerializableField>field).encoded(value, schema.check_on_set)
+        elif isinstance(field, SerializableObjectBase) and isinstance(value, (tuple, list, dict)):
+            values[(<Serializeable>field).__index] = element_values(field, value)
+        elif isinstance(field, SerializableArray) and isinstance(value, (tuple, list)):
+            elements = (<SerializableArray>field).bind((<SerializableArray>field).new_container(()))
+            elements.extend(value)
+            values[(<Serializeable>field).__index] = elements.__values
+        else:
+            setattr(element.bind(values), name, value)
+    return values
+
+
+cdef enum export_form:
+    EXPORT_TUPLE    # tuples of the fields with nested objects flattened, see SerializableObject.to_tuple
+    EXPORT_FLAT     # dicts keyed by the paths to the fields, see SerializableObject.to_dict
+    EXPORT_NESTED   # dicts keyed by field name, nested objects as dicts
+
+
+cdef object export_value(step_t * step, object value, bint getters, export_form form, str sep):
+    """Value of the field at step for to_tuple and to_dict, elements of arrays in form"""
+    cdef SerializableArray elements
+    cdef SerializableField element
+    cdef Plan plan
+    if step.kind == STEP_FIELD:
+        if getters and (<SerializableField>step.field).__getters:
+            return (<SerializableField>step.field).decoded(value)
+        return value
+    elif step.kind != STEP_ARRAY:
+        return (<bytes_>step.field).__default if value is None else value
+
+    elements = <SerializableArray>step.field
+    if isinstance(elements.__element_t, SerializableField):
+        element = elements.__element_t
+        if getters and element.__getters:
+            return [element.decoded(item) for item in value]
+        return value.tolist() if isinstance(value, array.array) else list(value)
+    plan = plan_of(elements.__element_t.__class__)
+    if form == EXPORT_TUPLE:
+        return [tuple(plan._leaves(item, getters, form, sep)) for item in value]
+    elif form == EXPORT_FLAT:
+        return [plan._flat_dict(item, getters, sep) for item in value]
+    return [plan._nested_dict(item, getters) for item in value]
+
+
+cdef dict nest_keys(dict data, str sep):
+    """data with keys like 'a.b' (for sep '.') moved into nested dicts"""
+    cdef dict nested = {}
+    cdef dict level
+    for key, value in data.items():
+        if not isinstance(key, str) or sep not in key:
+            nested[key] = value
+            continue
+        names = key.split(sep)
+        level = nested
+        for name in names[:-1]:
+            level = level.setdefault(name, {})
+        level[names[-1]] = value
+    return nested
+
+
+cdef inline void swap_elements(unsigned char * data, Py_ssize_t count, Py_ssize_t size) noexcept nogil:
+    """Reverses the byte order of count consecutive elements of size bytes in place"""
+    cdef Py_ssize_t i, j
+    cdef unsigned char tmp
+    for i in range(count):
+        for j in range(size // 2):
+            tmp = data[j]
+            data[j] = data[size - 1 - j]
+            data[size - 1 - j] = tmp
+        data += size
+
+
+cdef enum step_kind:
+    STEP_FIELD      # primitive field, decoded with the step's function pointers
+    STEP_OBJECT     # enter a nested object, its fields follow until the matching STEP_END
+    STEP_END        # leave a nested object
+    STEP_ARRAY      # SerializableArray, delegated to the array descriptor
+    STEP_BYTES      # fixed length bytes_, copied from the record
+    STEP_COUNTED    # bytes_ preceded by a count field, delegated to the descriptor
+
+cdef struct step_t:
+    step_kind       kind
+    uint32_t        index       # field index in the enclosing container
+    uint32_t        width       # number of fields in the nested container (STEP_OBJECT)
+    uint32_t        offset      # byte offset from the start of the record, valid when fixed
+    uint32_t        size        # packed size of a field (STEP_FIELD, STEP_BYTES)
+    bint            fixed       # False once a variable length field precedes this step
+    uint32_t        run         # bytes of fields from this step up to the next array or the end
+    serializer_t    unpacker
+    deserializer_t  packer
+    PyObject *      field       # borrowed, kept alive by Plan.__fields
+    PyObject *      byte_order  # resolved byte order of the enclosing object (STEP_ARRAY)
+
+
+cdef inline Plan plan_of(object cls, bytes byte_order=None):
+    """Plan for cls, byte_order is that of the enclosing object if any"""
+    cdef object plan = cls._plan
+    if plan is None:
+        raise NotImplementedError('{} has NoneType fields that must be implemented in a subclass'.format(cls.__name__))
+    if byte_order is None or byte_order == (<Plan>plan).byte_order or cls._byte_order is not None:
+        return <Plan>plan
+
+    # inherits a byte order other than native from the enclosing object
+    plan = cls.__dict__.get('_swapped_plan')
+    if plan is None:
+        plan = Plan(cls, byte_order)
+        cls._swapped_plan = plan
+    return <Plan>plan
+
+
+cdef uint32_t count_steps(object cls) except? 0:
+    cdef uint32_t n = 0
+    for field_name in cls._field_order:
+        field = cls.__dict__[field_name]
+        if isinstance(field, SerializableObjectBase):
+            n += count_steps(field.__class__) + 2
+        else:
+            n += 1
+    return n
+
+
+cdef class BufferRef(object):
+    """Holds a buffer export for as long as views decode from it"""
+    cdef:
+        Py_buffer view
+        bint acquired
+        readonly bint readonly
+
+    def __cinit__(self, buffer):
+        PyObject_GetBuffer(buffer, &self.view, PyBUF_SIMPLE)
+        self.acquired = True
+        self.readonly = self.view.readonly
+
+    def __dealloc__(self):
+        if self.acquired:
+            PyBuffer_Release(&self.view)
+
+
+cdef class ViewState(object):
+    """Where the fields of a lazily decoded object live"""
+    cdef:
+        BufferRef  buffer
+        Py_ssize_t base     # offset of the record in the buffer
+        Plan       plan     # plan of the viewed class, offsets are relative to base
+
+    cdef inline const unsigned char * data(self):
+        return <const unsigned char *>self.buffer.view.buf + self.base
+
+    cdef inline Py_ssize_t length(self):
+        """Bytes available from data()"""
+        return self.buffer.view.len - self.base
+
+    cdef unsigned char * writable_data(self) except NULL:
+        if self.buffer.readonly:
+            raise TypeError("Can't assign to a view of a read-only buffer")
+        return <unsigned char *>self.buffer.view.buf + self.base
+
+    cdef object child(self, object cls, uint32_t index):
+        """View of the nested object field at index"""
+        cdef step_t * step = self.plan.field_step(index)
+        return make_view(cls, plan_of(cls, <bytes>step.byte_order), self.buffer, self.base + step.offset)
+
+
+cdef object make_view(object cls, Plan plan, BufferRef buffer, Py_ssize_t base):
+    cdef SerializableObjectBase obj
+    cdef ViewState view
+
+    if plan.fixed_size < 0:
+        raise TypeError("{} has variable length fields and can't be viewed".format(cls.__name__))
+    if base < 0 or base + plan.fixed_size > buffer.view.len:
+        raise ValueError("{} needs {} bytes at offset {}, the buffer holds {}".format(cls.__name__, plan.fixed_size, base, buffer.view.len))
+
+    view = ViewState.__new__(ViewState)
+    view.buffer = buffer
+    view.base = base
+    view.plan = plan
+
+    obj = cls.__new__(cls, NO_VALUES)
+    obj.__view = view
+    return obj
+
+
+cdef inline list container_of(SerializableBase obj):
+    """Values of obj, decoding them first if obj is a view"""
+    cdef uint32_t offset = 0
+    cdef list values
+    if obj.__view is None:
+        return obj.__values
+    values = [None] * obj.__view.plan.width
+    obj.__view.plan._unpack(obj.__view.data(), obj.__view.length(), &offset, values, obj)
+    return values
+
+
+cdef object decode_object(object cls, Plan plan, const unsigned char * bindata, Py_ssize_t length, uint32_t * offset):
+    """Creates an instance of cls from the record at bindata + offset, __init__ is not called"""
+    cdef SerializableObjectBase obj
+    cdef list values
+    cdef probe_t probe
+    cdef bint timed = INSTRUMENTED
+    cdef uint32_t start = offset[0]
+    if timed:
+        probe = start_probe()
+    obj = cls.__new__(cls, NO_VALUES)
+    values = [None] * plan.width
+    plan._unpack(bindata, length, offset, values, obj)
+    obj.__values = values
+    if timed:
+        stop_probe(&probe, cls, 'unpack', offset[0] - start)
+    return obj
+
+
+cdef object decode_object_from(object cls, Plan plan, object buffer):
+    cdef Py_buffer view
+    cdef uint32_t offset = 0
+    PyObject_GetBuffer(buffer, &view, PyBUF_SIMPLE)
+    try:
+        return decode_object(cls, plan, <const unsigned char *>view.buf, view.len, &offset)
+    finally:
+        PyBuffer_Release(&view)
+
+
+cdef list decode_batch(object cls, Plan plan, object buffers, int threads):
+    """Decodes records of a class without arrays from a buffer or a sequence of buffers
+
+    Records are staged as one variant per plan step, filled in parallel
+    without the GIL, then boxed into objects.
+    """
+    cdef bint single = PyObject_CheckBuffer(buffers)
+    cdef list sources = [buffers] if single else list(buffers)
+    cdef Py_buffer * views = <Py_buffer *>malloc(max(len(sources), 1) * sizeof(Py_buffer))
+    cdef Py_ssize_t acquired = 0
+    cdef const unsigned char ** records = NULL
+    cdef variant_container * staged = NULL
+    cdef Py_ssize_t i, count, size = plan.fixed_size
+    cdef uint32_t width = plan.length
+    cdef SerializableObjectBase obj
+    cdef list values
+    cdef list objects = []
+
+    if views == NULL:
+        raise MemoryError()
+    try:
+        for source in sources:
+            PyObject_GetBuffer(source, &views[acquired], PyBUF_SIMPLE)
+            acquired += 1
+
+        if size == 0:
+            raise ValueError("{} records are empty and can't be decoded".format(cls.__name__))
+        elif single:
+            count = views[0].len // size
+            if count * size != views[0].len:
+                plan._truncated(0, count * size, views[0].len)
+        else:
+            count = acquired
+
+        records = <const unsigned char **>malloc(max(count, 1) * sizeof(const unsigned char *))
+        staged = <variant_container *>malloc(max(count * width, 1) * sizeof(variant_container))
+        if records == NULL or staged == NULL:
+            raise MemoryError()
+        for i in range(count):
+            if single:
+                records[i] = <const unsigned char *>views[0].buf + i * size
+            elif views[i].len < size:
+                plan._truncated(0, 0, views[i].len)
+            else:
+                records[i] = <const unsigned char *>views[i].buf
+
+        with nogil:
+            for i in prange(count, num_threads=threads, schedule='static'):
+                plan._stage(records[i], staged + i * width)
+
+        for i in range(count):
+            obj = cls.__new__(cls, NO_VALUES)
+            values = [None] * plan.width
+            plan._box(records[i], staged + i * width, values)
+            obj.__values = values
+            objects.append(obj)
+    finally:
+        for i in range(acquired):
+            PyBuffer_Release(&views[i])
+        free(views)
+        free(records)
+        free(staged)
+    return objects
+
+
+cdef int decode_objects(object cls, Plan plan, object source, Py_ssize_t * position, Py_ssize_t limit, list out) except -1:
+    """Decodes up to limit complete records from source starting at position
+
+    position is left following the last decoded record, also when a
+    record fails to decode.
+    """
+    cdef Py_buffer view
+    cdef Py_ssize_t size, pos = position[0]
+    cdef uint32_t offset
+    cdef const unsigned char * bindata
+
+    PyObject_GetBuffer(source, &view, PyBUF_SIMPLE)
+    try:
+        bindata = <const unsigned char *>view.buf
+        while limit > 0:
+            size = plan._measure(bindata + pos, view.len - pos)
+            if size < 0:
+                break
+            elif size == 0:
+                raise ValueError("{} records are empty and can't be iterated".format(cls.__name__))
+            offset = 0
+            out.append(decode_object(cls, plan, bindata + pos, size, &offset))
+            pos += size
+            limit -= 1
+    finally:
+        PyBuffer_Release(&view)
+        position[0] = pos
+    return 0
+
+
+cdef list record_tuples(object cls, Plan plan, object source, bint getters, Py_ssize_t start):
+    """to_tuple of each record of cls in source following start, see SerializableObject.decode_records"""
+    cdef Py_buffer view
+    cdef Py_ssize_t size, pos = start
+    cdef uint32_t offset
+    cdef const unsigned char * bindata
+    cdef list records = []
+
+    PyObject_GetBuffer(source, &view, PyBUF_SIMPLE)
+    try:
+        if start < 0 or start > view.len:
+            raise ValueError("offset {} is outside the buffer of {} bytes".format(start, view.len))
+        bindata = <const unsigned char *>view.buf
+        if plan.flat and plan.fixed_size > 0:
+            while pos + plan.fixed_size <= view.len:
+                records.append(plan._read_leaves(bindata + pos, getters))
+                pos += plan.fixed_size
+        while pos < view.len:
+            size = plan._measure(bindata + pos, view.len - pos)
+            if size < 0:
+                break
+            elif size == 0:
+                raise ValueError("{} records are empty and can't be decoded".format(cls.__name__))
+            if plan.flat:
+                records.append(plan._read_leaves(bindata + pos, getters))
+            else:
+                offset = 0
+                obj = decode_object(cls, plan, bindata + pos, size, &offset)
+                records.append(tuple(plan._leaves((<SerializableBase>obj).__values, getters, EXPORT_TUPLE, None)))
+            pos += size
+        if pos < view.len:
+            raise EOFError("{} bytes of a truncated {} at the end of the buffer".format(view.len - pos, cls.__name__))
+    finally:
+        PyBuffer_Release(&view)
+    return records
+
+
+def _scan_records(cls, source, Py_ssize_t start=0, keys=()):
+    """Offsets of the complete records of cls in source following start, for RecordIndex
+
+    Only the fields a record's size depends on are read, and the stored
+    values of keys, paths to fields at a fixed offset. Returns the offsets
+    (array of 'Q'), an array of values for each key, and the offset
+    following the last complete record.
+    """
+    cdef Plan plan = plan_of(cls)
+    cdef Py_buffer view
+    cdef Py_ssize_t size, count = 0, pos = start
+    cdef uint32_t offset
+    cdef const unsigned char * bindata
+    cdef array.array offsets = array.array('Q')
+    cdef list paths = compile_paths(cls, keys)
+    cdef list columns = []
+    cdef FieldPath path
+    cdef step_t * step
+
+    for path in paths:
+        typecode = None
+        if path.leaf is not None and path.offset is not None:
+            typecode = _array_typecodes.get((_numpy_kinds.get(path.leaf.__format), path.leaf.size))
+        if typecode is None:
+            raise TypeError("key '{}' of {} must be a numeric field at a fixed offset".format(path.path, cls.__name__))
+        columns.append(array.array(typecode))
+
+    PyObject_GetBuffer(source, &view, PyBUF_SIMPLE)
+    try:
+        bindata = <const unsigned char *>view.buf
+        while True:
+            size = plan._measure(bindata + pos, view.len - pos)
+            if size < 0:
+                break
+            elif size == 0:
+                raise ValueError("{} records are empty and can't be indexed".format(cls.__name__))
+            array.resize_smart(offsets, count + 1)
+            offsets.data.as_ulonglongs[count] = pos
+            for i in range(len(paths)):
+                step = &plan.steps[(<FieldPath>paths[i]).step]
+                offset = step.offset
+                columns[i].append(make_object_from_variant(step.unpacker(bindata + pos, &offset)))
+            count += 1
+            pos += size
+    finally:
+        PyBuffer_Release(&view)
+    return offsets, columns, pos
+
+
+def _iter_buffer(cls, Plan plan, source):
+    cdef Py_ssize_t pos = 0
+    cdef list records = []
+    while True:
+        decode_objects(cls, plan, source, &pos, 1024, records)
+        if len(records) == 0:
+            break
+        yield from records
+        records = []
+    if pos < memoryview(source).nbytes:
+        raise EOFError("{} bytes of a truncated {} at the end of the buffer".format(memoryview(source).nbytes - pos, cls.__name__))
+
+
+def _iter_stream(cls, Plan plan, stream, Py_ssize_t chunk_size):
+    cdef FrameBuffer frames = FrameBuffer(cls)
+    read = getattr(stream, 'read', None) or getattr(stream, 'recv')
+
+    while True:
+        chunk = read(chunk_size)
+        if not chunk:
+            break
+        yield from frames.feed(chunk)
+        if frames.error is not None:
+            break
+    frames.close()
+
+
+cdef class FrameBuffer(object):
+    """Reassembles records of a class, or of the classes of a Registry, from the chunks of a byte stream
+
+    feed returns the records completed by each chunk, only the bytes of a
+    partial record are kept between calls. When a record fails to decode,
+    the records preceding it in the chunk are returned and the error is
+    raised by the following calls to feed and close.
+    """
+    cdef:
+        readonly object cls
+        Plan            plan
+        Registry        registry
+        bytearray       buffer
+        readonly object error       # raised by every later feed and close, None if there's none
+
+    def __cinit__(self, cls):
+        self.cls = cls
+        if isinstance(cls, Registry):
+            self.registry = cls
+        else:
+            self.plan = plan_of(cls)
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        """List of the records completed by data, objects are created without calling __init__"""
+        cdef list records = []
+        cdef Py_ssize_t pos = 0
+        self.buffer += data
+        self.raise_error()
+        try:
+            if self.registry is not None:
+                self.registry.decode(self.buffer, &pos, len(self.buffer), records)
+            else:
+                decode_objects(self.cls, self.plan, self.buffer, &pos, len(self.buffer), records)
+        except Exception as e:
+            if not records:
+                raise
+            # hand out the records decoded before the failing one first
+            self.error = e
+        finally:
+            # bytearray drops a prefix without moving the rest
+            del self.buffer[:pos]
+        return records
+
+    cdef int raise_error(self) except -1:
+        if self.error is not None:
+            raise self.error
+        return 0
+
+    property pending:
+        """Bytes of a partial record waiting for more data"""
+        def __get__(self):
+            return len(self.buffer)
+
+    def close(self):
+        """Raises EOFError if the stream ended part way through a record"""
+        self.raise_error()
+        if len(self.buffer) > 0:
+            raise EOFError("{} bytes of a truncated {} at the end of the stream".format(len(self.buffer), getattr(self.cls, '__name__', self.cls)))
+
+
+cdef class Registry(object):
+    """Decodes records whose class is picked by a tag field of a common base class
+
+        registry = Registry(GenericDatagram, tag='kind', length='length')
+        registry.register(BoundingBoxDatagram)
+
+    tag (and length) are dotted paths to integer fields at the same fixed
+    offset in every registered class. Records with a tag that isn't
+    registered are skipped by iter_unpack when there's a length field, the
+    size of a record being its value plus length_adjust.
+    """
+    cdef:
+        readonly object     base
+        readonly object     tag
+        readonly object     length
+        readonly Py_ssize_t length_adjust
+        dict                classes     # class by tag
+        list                dense       # class by tag for tags below 256, None when not registered
+        bint                located     # offsets below are set, from the first registered class
+        uint32_t            tag_offset
+        uint32_t            tag_size
+        serializer_t        tag_unpacker
+        uint32_t            length_offset
+        uint32_t            length_size
+        serializer_t        length_unpacker
+        uint32_t            header      # bytes needed to read the tag and length
+
+    def __cinit__(self, base, tag, length=None, Py_ssize_t length_adjust=0):
+        self.base = base
+        self.tag = tag
+        self.length = length
+        self.length_adjust = length_adjust
+        self.classes = {}
+        self.dense = [None] * 256
+
+    def __repr__(self):
+        return "Registry({}, '{}')".format(self.base.__name__, self.tag)
+
+    def __len__(self):
+        return len(self.classes)
+
+    def __contains__(self, tag):
+        return tag in self.classes
+
+    def __getitem__(self, tag):
+        return self.classes[tag]
+
+    def register(self, cls, tag=None):
+        """Registers cls for records with tag, by default the value (or default) of its tag field
+
+        Returns cls, so it can be used as a class decorator.
+        """
+        cdef Plan plan
+        cdef step_t * step
+        cdef FieldPath tag_path, length_path = None
+
+        if not (isinstance(cls, type) and issubclass(cls, self.base)):
+            raise TypeError("only subclasses of {} can be registered, given {!r}".format(self.base.__name__, cls))
+        plan = plan_of(cls)
+        tag_path = self.field_path(cls, self.tag)
+        if self.length is not None:
+            length_path = self.field_path(cls, self.length)
+        if tag is None:
+            tag = tag_path.leaf.__default
+            if tag is None:
+                raise ValueError("{}.{} has no value to register {} with, give a tag".format(cls.__name__, self.tag, cls.__name__))
+        if tag in self.classes:
+            raise ValueError("tag {} is already registered to {}".format(tag, self.classes[tag].__name__))
+
+        if not self.located:
+            step = &plan.steps[tag_path.step]
+            self.tag_offset, self.tag_size, self.tag_unpacker = step.offset, step.size, step.unpacker
+            self.header = step.offset + step.size
+            if length_path is not None:
+                step = &plan.steps[length_path.step]
+                self.length_offset, self.length_size, self.length_unpacker = step.offset, step.size, step.unpacker
+                self.header = max(self.header, step.offset + step.size)
+            self.located = True
+        elif (tag_path.offset != self.tag_offset or plan.steps[tag_path.step].unpacker != self.tag_unpacker
+              or (length_path is not None and (length_path.offset != self.length_offset or plan.steps[length_path.step].unpacker != self.length_unpacker))):
+            raise ValueError("{} doesn't have the tag and length fields where the classes already registered have them".format(cls.__name__))
+
+        self.classes[tag] = cls
+        if 0 <= tag < 256:
+            self.dense[tag] = cls
+        return cls
+
+    cdef FieldPath field_path(self, object cls, object path):
+        cdef FieldPath compiled = compiled_path(cls, path)
+        if compiled.leaf is None or compiled.offset is None or compiled.leaf.__python_t is not int:
+            raise TypeError("'{}' of {} must be an integer field at a fixed offset".format(path, cls.__name__))
+        return compiled
+
+    cdef inline object lookup(self, const unsigned char * record):
+        """Class registered for the tag of record, None if there's none"""
+        cdef uint32_t offset = self.tag_offset
+        cdef int64_t tag = integer_from_variant(self.tag_unpacker(record, &offset))
+        if 0 <= tag < 256:
+            return self.dense[tag]
+        return self.classes.get(tag)
+
+    cdef inline Py_ssize_t record_size(self, const unsigned char * record):
+        cdef uint32_t offset = self.length_offset
+        return integer_from_variant(self.length_unpacker(record, &offset)) + self.length_adjust
+
+    def unpack(self, buffer, Py_ssize_t offset=0):
+        """Decodes the record at offset in buffer as the class registered for its tag
+
+        Raises ValueError if the tag isn't registered. The object is created
+        without calling __init__.
+        """
+        cdef Py_buffer view
+        cdef uint32_t position = offset
+        cdef const unsigned char * bindata
+
+        if not self.located:
+            raise ValueError("{!r} has no registered classes".format(self))
+        PyObject_GetBuffer(buffer, &view, PyBUF_SIMPLE)
+        try:
+            if offset < 0 or offset + self.header > view.len:
+                raise TruncatedError(self.tag, offset + self.header, view.len)
+            bindata = <const unsigned char *>view.buf
+            cls = self.lookup(bindata + offset)
+            if cls is None:
+                position = self.tag_offset
+                raise ValueError("no class is registered for tag {}".format(make_object_from_variant(self.tag_unpacker(bindata + offset, &position))))
+            return decode_object(cls, plan_of(cls), bindata, view.len, &position)
+        finally:
+            PyBuffer_Release(&view)
+
+    def iter_unpack(self, source, Py_ssize_t chunk_size=65536):
+        """Yields the records of source as the classes registered for their tags
+
+        source is a bytes-like object or a binary stream, as for
+        SerializableObject.iter_unpack. Records with unregistered tags are
+        skipped when there's a length field, otherwise they raise ValueError.
+        """
+        if hasattr(source, 'read') or hasattr(source, 'recv'):
+            return _iter_stream(self, None, source, chunk_size)
+        return _iter_tagged(self, source)
+
+    cdef int decode(self, object source, Py_ssize_t * position, Py_ssize_t limit, list out) except -1:
+        """Decodes up to limit complete records from source starting at position
+
+        position is left following the last record decoded or skipped, also
+        when a record fails to decode.
+        """
+        cdef Py_buffer view
+        cdef Py_ssize_t size, remaining, pos = position[0]
+        cdef uint32_t offset
+        cdef const unsigned char * bindata
+        cdef Plan plan
+
+        if not self.located:
+            raise ValueError("{!r} has no registered classes".format(self))
+        PyObject_GetBuffer(source, &view, PyBUF_SIMPLE)
+        try:
+            bindata = <const unsigned char *>view.buf
+            while limit > 0:
+                remaining = view.len - pos
+                if remaining < self.header:
+                    break
+                cls = self.lookup(bindata + pos)
+                if cls is None:
+                    if self.length_unpacker == NULL:
+                        offset = self.tag_offset
+                        raise ValueError("no class is registered for tag {}".format(make_object_from_variant(self.tag_unpacker(bindata + pos, &offset))))
+                    size = self.record_size(bindata + pos)
+                    if size < self.header:
+                        raise ValueError("record of {} bytes at offset {} is shorter than its header".format(size, pos))
+                    if size > remaining:
+                        break
+                    pos += size
+                    continue
+                plan = plan_of(cls)
+                size = plan._measure(bindata + pos, remaining)
+                if size < 0:
+                    break
+                offset = 0
+                out.append(decode_object(cls, plan, bindata + pos, size, &offset))
+                pos += size
+                limit -= 1
+        finally:
+            PyBuffer_Release(&view)
+            position[0] = pos
+        return 0
+
+
+def _iter_tagged(Registry registry, source):
+    cdef Py_ssize_t start, pos = 0
+    cdef list records
+    while True:
+        records = []
+        start = pos
+        registry.decode(source, &pos, 1024, records)
+        yield from records
+        if pos == start:
+            break
+    if pos < memoryview(source).nbytes:
+        raise EOFError("{} bytes of a truncated record at the end of the buffer".format(memoryview(source).nbytes - pos))
+
+
+cdef class Plan(object):
+    """Flattened, typed walk over the fields of a SerializableObject class
+
+    Built once per class when its layout is first determined. Nested
+    SerializableObject fields are inlined between STEP_OBJECT and STEP_END
+    markers so unpacking and packing run as a single loop over a C array
+    instead of looking fields up in the class dict on every call.
+    """
+    cdef:
+        step_t *          steps
+        readonly uint32_t length     # number of steps
+        readonly uint32_t width      # number of fields in the top level container
+        uint32_t          leaves     # number of fields, nested objects' included, see _leaves
+        uint32_t          depth      # deepest nesting of objects, the stack size of the walks below
+        readonly uint32_t size       # packed size excluding any SerializableArray contents
+        readonly bint     flat       # True when there are no SerializableArray fields
+        readonly bytes    byte_order # resolved byte order of the class's own fields
+        readonly Py_ssize_t fixed_size # size of a record when no field is variable length, otherwise -1
+        uint32_t *        fields     # step of each top level field by field index
+        list              __fields   # descriptors referenced by steps
+        dict              __names    # leaf_names by separator
+
+    def __cinit__(self, cls, byte_order=None):
+        cdef uint32_t i, depth = 0
+        cdef uint32_t offset = 0
+        cdef bint fixed = True
+
+        if cls._byte_order is not None:
+            byte_order = cls._byte_order
+        self.byte_order = resolve_byte_order(byte_order)
+        self.__fields = []
+        self.width = len(cls._field_order)
+        self.length = 0
+        self.size = 0
+        self.flat = True
+        self.steps = <step_t *>malloc(max(count_steps(cls), 1) * sizeof(step_t))
+        self.fields = <uint32_t *>malloc(max(self.width, 1) * sizeof(uint32_t))
+        if self.steps == NULL or self.fields == NULL:
+            raise MemoryError()
+        self._compile(cls, self.byte_order, &offset, &fixed)
+        self.fixed_size = offset if fixed else -1
+
+        # bounds are checked once per run of fields between arrays
+        for i in reversed(range(self.length)):
+            if self.steps[i].kind == STEP_ARRAY or self.steps[i].kind == STEP_COUNTED:
+                self.steps[i].run = 0
+            elif i + 1 < self.length:
+                self.steps[i].run = self.steps[i].size + self.steps[i + 1].run
+            else:
+                self.steps[i].run = self.steps[i].size
+
+        # index the top level fields, nested fields sit between STEP_OBJECT and STEP_END
+        self.leaves = 0
+        for i in range(self.length):
+            if depth == 0 and self.steps[i].kind != STEP_END:
+                self.fields[self.steps[i].index] = i
+            if self.steps[i].kind != STEP_OBJECT and self.steps[i].kind != STEP_END:
+                self.leaves += 1
+            if self.steps[i].kind == STEP_OBJECT:
+                depth += 1
+                self.depth = max(self.depth, depth)
+            elif self.steps[i].kind == STEP_END:
+                depth -= 1
+
+    def __dealloc__(self):
+        free(self.steps)
+        free(self.fields)
+
+    cdef inline step_t * field_step(self, uint32_t index):
+        return &self.steps[self.fields[index]]
+
+    cdef uint32_t child_step(self, uint32_t parent, uint32_t index) except? 0:
+        """Step of the field at index of the nested object entered at step parent"""
+        cdef uint32_t i, depth = 0
+        for i in range(parent + 1, self.length):
+            if depth == 0 and self.steps[i].kind != STEP_END and self.steps[i].index == index:
+                return i
+            if self.steps[i].kind == STEP_OBJECT:
+                depth += 1
+            elif self.steps[i].kind == STEP_END:
+                if depth == 0:
+                    break
+                depth -= 1
+        raise KeyError(index)
+
+    cdef inline list new_stack(self):
+        """Room for the containers enclosing the current one in a walk over the steps, None when nothing nests
+
+        A list of fixed size indexed by depth, pushing and popping would
+        reallocate it every time the walk goes in and out of an object.
+        """
+        if self.depth == 0:
+            return None
+        return [None] * self.depth
+
+    cdef inline void _add(self, step_t step):
+        self.steps[self.length] = step
+        self.length += 1
+
+    cdef int _compile(self, object cls, bytes byte_order, uint32_t * offset, bint * fixed) except -1:
+        cdef step_t step
+        cdef uint32_t index
+        cdef object field
+
+        for index, field_name in enumerate(cls._field_order):
+            field = cls.__dict__[field_name]
+            self.__fields.append(field)
+
+            step.index = index
+            step.width = 0
+            step.size = 0
+            step.offset = offset[0]
+            step.fixed = fixed[0]
+            step.run = 0
+            step.unpacker = NULL
+            step.packer = NULL
+            step.field = <PyObject *>field
+            step.byte_order = <PyObject *>byte_order
+
+            if isinstance(field, SerializableField):
+                step.kind = STEP_FIELD
+                step.size = (<SerializableField>field).size
+                if (<SerializableField>field).swapped(byte_order):
+                    step.unpacker = (<SerializableField>field)._unpacker_swap
+                    step.packer = (<SerializableField>field)._packer_swap
+                else:
+                    step.unpacker = (<SerializableField>field)._unpacker
+                    step.packer = (<SerializableField>field)._packer
+                self._add(step)
+                offset[0] += (<SerializableField>field).size
+                self.size += (<SerializableField>field).size
+            elif isinstance(field, SerializableObjectBase):
+                step.kind = STEP_OBJECT
+                step.width = len(field.__class__._field_order)
+                self._add(step)
+                if field.__class__._byte_order is not None:
+                    self._compile(field.__class__, resolve_byte_order(field.__class__._byte_order), offset, fixed)
+                else:
+                    self._compile(field.__class__, byte_order, offset, fixed)
+                step.kind = STEP_END
+                self._add(step)
+            elif isinstance(field, bytes_) and (<bytes_>field).length is not None:
+                step.kind = STEP_BYTES
+                step.size = (<bytes_>field).length
+                self._add(step)
+                offset[0] += step.size
+                self.size += step.size
+            elif isinstance(field, bytes_):
+                step.kind = STEP_COUNTED
+                self._add(step)
+                self.flat = False
+                fixed[0] = False
+            elif isinstance(field, SerializableArray):
+                step.kind = STEP_ARRAY
+                self._add(step)
+                self.flat = False
+                if (<SerializableArray>field)._fixed_size() >= 0:
+                    offset[0] += (<SerializableArray>field)._fixed_size()
+                else:
+                    fixed[0] = False
+            else:
+                raise Exception("Attempted to use unknown Serializeable ({}) to unpack.".format(type(field)))
+
+    cdef int _truncated(self, uint32_t start, Py_ssize_t offset, Py_ssize_t length) except -1:
+        """Raises TruncatedError for the first field of the run at step start that runs past length"""
+        cdef uint32_t i, j
+        cdef list path
+        for i in range(start, self.length):
+            offset += self.steps[i].size
+            if (self.steps[i].kind == STEP_FIELD or self.steps[i].kind == STEP_BYTES) and offset > length:
+                break
+
+        # dotted path to the field through any nested objects
+        path = []
+        for j in range(i + 1):
+            if self.steps[j].kind == STEP_OBJECT:
+                path.append((<Serializeable>self.steps[j].field).__name)
+            elif self.steps[j].kind == STEP_END:
+                path.pop()
+        path.append((<Serializeable>self.steps[i].field).__name)
+        raise TruncatedError('.'.join(path), offset, length)
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    cdef int _unpack(self, const unsigned char * bindata, Py_ssize_t length, uint32_t * offset, list container, object parent, bint reuse=False) except -1:
+        """Decodes into container, raises TruncatedError rather than read past bindata + length
+
+        With reuse, the lists already in container for nested objects and
+        arrays are filled in place when their shapes match.
+        """
+        cdef uint32_t i
+        cdef step_t * step
+        cdef list current = container
+        cdef list values
+        cdef list stack = self.new_stack()
+        cdef uint32_t depth = 0
+        cdef object existing
+
+        if self.length > 0 and offset[0] + self.steps[0].run > length:
+            self._truncated(0, offset[0], length)
+
+        for i in range(self.length):
+            step = &self.steps[i]
+            if step.kind == STEP_FIELD:
+                current[step.index] = make_object_from_variant(step.unpacker(bindata, offset))
+            elif step.kind == STEP_OBJECT:
+                existing = current[step.index] if reuse else None
+                if type(existing) is list and len(<list>existing) == step.width:
+                    values = existing
+                else:
+                    values = [None] * step.width
+                    current[step.index] = values
+                stack[depth] = current
+                depth += 1
+                current = values
+            elif step.kind == STEP_END:
+                depth -= 1
+                current = stack[depth]
+            elif step.kind == STEP_BYTES:
+                current[step.index] = (<bytes_>step.field).decode(bindata + offset[0], step.size)
+                offset[0] += step.size
+            else:
+                if step.kind == STEP_ARRAY:
+                    existing = current[step.index] if reuse else None
+                    current[step.index] = (<SerializableArray>step.field)._unpack(bindata, length, offset, parent, <bytes>step.byte_order, existing)
+                else:
+                    current[step.index] = (<bytes_>step.field)._unpack(bindata, length, offset, <bytes>step.byte_order)
+                if i + 1 < self.length and offset[0] + self.steps[i + 1].run > length:
+                    self._truncated(i + 1, offset[0], length)
+
+    cdef void _stage(self, const unsigned char * bindata, variant_container * staged) noexcept nogil:
+        """Decodes the fields of a record without arrays into staged, one entry per step"""
+        cdef uint32_t i, offset
+        for i in range(self.length):
+            if self.steps[i].kind == STEP_FIELD:
+                offset = self.steps[i].offset
+                staged[i] = self.steps[i].unpacker(bindata, &offset)
+
+    cdef int _box(self, const unsigned char * bindata, const variant_container * staged, list container) except -1:
+        """Fills container from values decoded by _stage from the record at bindata"""
+        cdef uint32_t i
+        cdef step_t * step
+        cdef list current = container
+        cdef list values
+        cdef list stack = self.new_stack()
+        cdef uint32_t depth = 0
+
+        for i in range(self.length):
+            step = &self.steps[i]
+            if step.kind == STEP_FIELD:
+                current[step.index] = make_object_from_variant(staged[i])
+            elif step.kind == STEP_BYTES:
+                current[step.index] = (<bytes_>step.field).decode(bindata + step.offset, step.size)
+            elif step.kind == STEP_OBJECT:
+                values = [None] * step.width
+                current[step.index] = values
+                stack[depth] = current
+                depth += 1
+                current = values
+            elif step.kind == STEP_END:
+                depth -= 1
+                current = stack[depth]
+
+    cdef tuple leaf_names(self, str sep):
+        """Paths to the fields in the order of _leaves, joined with sep"""
+        cdef uint32_t i
+        cdef list path = []
+        cdef list names = []
+        if self.__names is None:
+            self.__names = {}
+        elif sep in self.__names:
+            return self.__names[sep]
+
+        for i in range(self.length):
+            if self.steps[i].kind == STEP_OBJECT:
+                path.append((<Serializeable>self.steps[i].field).__name)
+            elif self.steps[i].kind == STEP_END:
+                path.pop()
+            else:
+                names.append(sep.join(path + [(<Serializeable>self.steps[i].field).__name]))
+        self.__names[sep] = tuple(names)
+        return self.__names[sep]
+
+    cdef list _leaves(self, list container, bint getters, export_form form, str sep):
+        """Values of the fields of container in packing order, nested objects flattened"""
+        cdef uint32_t i
+        cdef step_t * step
+        cdef list current = container
+        cdef list stack = []
+        cdef list out = []
+
+        for i in range(self.length):
+            step = &self.steps[i]
+            if step.kind == STEP_OBJECT:
+                stack.append(current)
+                current = current[step.index]
+            elif step.kind == STEP_END:
+                current = stack.pop()
+            else:
+                out.append(export_value(step, current[step.index], getters, form, sep))
+        return out
+
+    cdef dict _flat_dict(self, list container, bint getters, str sep):
+        """Values of the fields of container keyed by leaf_names"""
+        cdef tuple names = self.leaf_names(sep)
+        cdef list leaves = self._leaves(container, getters, EXPORT_FLAT, sep)
+        cdef dict out = {}
+        cdef Py_ssize_t i
+        for i in range(len(names)):
+            out[names[i]] = leaves[i]
+        return out
+
+    cdef dict _nested_dict(self, list container, bint getters):
+        """Values of the fields of container keyed by name, nested objects as dicts"""
+        cdef uint32_t i
+        cdef step_t * step
+        cdef list current = container
+        cdef dict out = {}
+        cdef dict result = out
+        cdef list stack = []
+
+        for i in range(self.length):
+            step = &self.steps[i]
+            if step.kind == STEP_OBJECT:
+                stack.append((current, out))
+                out[(<Serializeable>step.field).__name] = {}
+                out = out[(<Serializeable>step.field).__name]
+                current = current[step.index]
+            elif step.kind == STEP_END:
+                current, out = stack.pop()
+            else:
+                out[(<Serializeable>step.field).__name] = export_value(step, current[step.index], getters, EXPORT_NESTED, None)
+        return result
+
+    cdef tuple _read_leaves(self, const unsigned char * bindata, bint getters):
+        """_leaves of the record at bindata, read straight from it, the plan must be flat"""
+        cdef uint32_t i, offset, leaf = 0
+        cdef step_t * step
+        cdef tuple out = PyTuple_New(self.leaves)
+        cdef object value
+
+        for i in range(self.length):
+            step = &self.steps[i]
+            if step.kind == STEP_FIELD:
+                offset = step.offset
+                value = make_object_from_variant(step.unpacker(bindata, &offset))
+                if getters and (<SerializableField>step.field).__getters:
+                    value = (<SerializableField>step.field).decoded(value)
+            elif step.kind == STEP_BYTES:
+                value = (<bytes_>step.field).decode(bindata + step.offset, step.size)
+            else:
+                continue
+            # the tuple steals a reference
+            Py_INCREF(value)
+            PyTuple_SET_ITEM(out, leaf, value)
+            leaf += 1
+        return out
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    cdef Py_ssize_t _sizeof(self, list container) except -1:
+        """Number of bytes _pack will write for container"""
+        cdef uint32_t i
+        cdef step_t * step
+        cdef list current = container
+        cdef list stack
+        cdef uint32_t depth = 0
+        cdef object value
+        cdef Py_ssize_t size = self.size
+
+        if self.flat:
+            return size
+
+        stack = self.new_stack()
+        for i in range(self.length):
+            step = &self.steps[i]
+            if step.kind == STEP_END:
+                depth -= 1
+                current = stack[depth]
+            elif step.kind == STEP_OBJECT:
+                value = current[step.index]
+                if value is None:
+                    raise Exception("{} not set".format((<Serializeable>step.field).__name))
+                stack[depth] = current
+                depth += 1
+                current = value
+            elif step.kind == STEP_ARRAY:
+                value = current[step.index]
+                if value is None:
+                    raise Exception("{} not set".format((<Serializeable>step.field).__name))
+                size += (<SerializableArray>step.field)._sizeof(value, <bytes>step.byte_order)
+            elif step.kind == STEP_COUNTED:
+                value = current[step.index]
+                if value is None:
+                    raise Exception("{} not set".format((<Serializeable>step.field).__name))
+                size += (<bytes_>step.field)._sizeof(value, <bytes>step.byte_order)
+        return size
+
+    cdef Py_ssize_t _measure(self, const unsigned char * bindata, Py_ssize_t length) except -2:
+        """Size of the record at bindata reading only the array counts, -1 if length is too short to tell"""
+        cdef uint32_t i
+        cdef step_t * step
+        cdef Py_ssize_t offset = 0
+
+        if self.flat:
+            return self.size if self.size <= length else -1
+
+        for i in range(self.length):
+            step = &self.steps[i]
+            if step.kind == STEP_FIELD or step.kind == STEP_BYTES:
+                offset += step.size
+            elif step.kind == STEP_ARRAY:
+                offset = (<SerializableArray>step.field)._measure(bindata, length, offset, <bytes>step.byte_order)
+                if offset < 0:
+                    return -1
+            elif step.kind == STEP_COUNTED:
+                offset = (<bytes_>step.field)._measure(bindata, length, offset, <bytes>step.byte_order)
+                if offset < 0:
+                    return -1
+        return offset if offset <= length else -1
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    cdef int _pack(self, unsigned char * buff, uint32_t * offset, list container) except -1:
+        """Writes container at buff + offset, buff must hold at least _sizeof(container) bytes"""
+        cdef uint32_t i
+        cdef step_t * step
+        cdef list current = container
+        cdef list stack = self.new_stack()
+        cdef uint32_t depth = 0
+        cdef object value
+
+        for i in range(self.length):
+            step = &self.steps[i]
+            if step.kind == STEP_END:
+                depth -= 1
+                current = stack[depth]
+                continue
+
+            value = current[step.index]
+            if value is None:
+                raise Exception("{} not set".format((<Serializeable>step.field).__name))
+
+            if step.kind == STEP_FIELD:
+                step.packer(buff, offset, value)
+            elif step.kind == STEP_OBJECT:
+                stack[depth] = current
+                depth += 1
+                current = value
+            elif step.kind == STEP_ARRAY:
+                (<SerializableArray>step.field)._pack(buff, offset, value, <bytes>step.byte_order)
+            else:
+                (<bytes_>step.field)._pack(buff, offset, value, <bytes>step.byte_order)
+
+    cdef int _repack(self, unsigned char * buff, list container, list shadow) except -1:
+        """Rewrites the fields of container that changed since it was packed into buff
+
+        shadow holds the values buff was packed from, see shadow_of, and is
+        brought up to date. A field at a fixed offset is skipped while its
+        value is the very object it was packed from. Arrays and everything
+        after a variable length field are always written, so buff must
+        already have the size of container.
+        """
+        cdef uint32_t i
+        cdef uint32_t position = 0
+        cdef step_t * step
+        cdef list current = container
+        cdef list packed = shadow
+        cdef list stack = self.new_stack()
+        cdef list packed_stack = self.new_stack()
+        cdef uint32_t depth = 0
+        cdef object value
+
+        for i in range(self.length):
+            step = &self.steps[i]
+            if step.kind == STEP_END:
+                depth -= 1
+                current = stack[depth]
+                packed = packed_stack[depth]
+                continue
+
+            value = current[step.index]
+            if value is None:
+                raise Exception("{} not set".format((<Serializeable>step.field).__name))
+            if step.fixed:
+                position = step.offset
+                if value is packed[step.index] and (step.kind == STEP_FIELD or step.kind == STEP_BYTES):
+                    continue
+
+            if step.kind == STEP_FIELD:
+                step.packer(buff, &position, value)
+            elif step.kind == STEP_OBJECT:
+                stack[depth] = current
+                packed_stack[depth] = packed
+                depth += 1
+                current = value
+                packed = packed[step.index]
+                continue
+            elif step.kind == STEP_ARRAY:
+                (<SerializableArray>step.field)._pack(buff, &position, value, <bytes>step.byte_order)
+            else:
+                (<bytes_>step.field)._pack(buff, &position, value, <bytes>step.byte_order)
+            packed[step.index] = value
@@ -1,27 +1,51 @@
 from .variant cimport *
 
-ctypedef variant_container (*serializer_t)(const unsigned char *, uint32_t *)
+ctypedef variant_container (*serializer_t)(const unsigned char *, uint32_t *) noexcept nogil
 
-cdef variant_container get_int8(const unsigned char * binbuffer, uint32_t *offset)
-cdef variant_container get_uint8(const unsigned char * binbuffer, uint32_t *offset)
-cdef variant_container get_int16(const unsigned char * binbuffer, uint32_t *offset)
-cdef variant_container get_uint16(const unsigned char * binbuffer, uint32_t *offset)
-cdef variant_container get_int32(const unsigned char * binbuffer, uint32_t *offset)
-cdef variant_container get_uint32(const unsigned char * binbuffer, uint32_t *offset)
-cdef variant_container get_int64(const unsigned char * binbuffer, uint32_t *offset)
-cdef variant_container get_uint64(const unsigned char * binbuffer, uint32_t *offset)
-cdef variant_container get_double(const unsigned char * binbuffer, uint32_t *offset)
-cdef variant_container get_float(const unsigned char * binbuffer, uint32_t *offset)
+cdef variant_container get_int8(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil
+cdef variant_container get_uint8(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil
+cdef variant_container get_int16(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil
+cdef variant_container get_uint16(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil
+cdef variant_container get_int32(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil
+cdef variant_container get_uint32(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil
+cdef variant_container get_int64(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil
+cdef variant_container get_uint64(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil
+cdef variant_container get_double(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil
+cdef variant_container get_float(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil
 
-ctypedef int (*deserializer_t)(bytearray, object) except -1
+# byte swapping variants for non-native byte order
+cdef variant_container get_int8_swap(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil
+cdef variant_container get_uint8_swap(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil
+cdef variant_container get_int16_swap(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil
+cdef variant_container get_uint16_swap(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil
+cdef variant_container get_int32_swap(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil
+cdef variant_container get_uint32_swap(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil
+cdef variant_container get_int64_swap(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil
+cdef variant_container get_uint64_swap(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil
+cdef variant_container get_double_swap(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil
+cdef variant_container get_float_swap(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil
 
-cdef int set_int8(bytearray binbuffer, object var) except -1
-cdef int set_uint8(bytearray binbuffer, object var) except -1
-cdef int set_int16(bytearray binbuffer, object var) except -1
-cdef int set_uint16(bytearray binbuffer, object var) except -1
-cdef int set_int32(bytearray binbuffer, object var) except -1
-cdef int set_uint32(bytearray binbuffer, object var) except -1
-cdef int set_int64(bytearray binbuffer, object var) except -1
-cdef int set_uint64(bytearray binbuffer, object var) except -1
-cdef int set_double(bytearray binbuffer, object var) except -1
-cdef int set_float(bytearray binbuffer, object var) except -1
\ No newline at end of file
+ctypedef int (*deserializer_t)(unsigned char *, uint32_t *, object) except -1
+
+cdef int set_int8(unsigned char * binbuffer, uint32_t *offset, object var) except -1
+cdef int set_uint8(unsigned char * binbuffer, uint32_t *offset, object var) except -1
+cdef int set_int16(unsigned char * binbuffer, uint32_t *offset, object var) except -1
+cdef int set_uint16(unsigned char * binbuffer, uint32_t *offset, object var) except -1
+cdef int set_int32(unsigned char * binbuffer, uint32_t *offset, object var) except -1
+cdef int set_uint32(unsigned char * binbuffer, uint32_t *offset, object var) except -1
+cdef int set_int64(unsigned char * binbuffer, uint32_t *offset, object var) except -1
+cdef int set_uint64(unsigned char * binbuffer, uint32_t *offset, object var) except -1
+cdef int set_double(unsigned char * binbuffer, uint32_t *offset, object var) except -1
+cdef int set_float(unsigned char * binbuffer, uint32_t *offset, object var) except -1
+
+# byte swapping variants for non-native byte order
+cdef int set_int8_swap(unsigned char * binbuffer, uint32_t *offset, object var) except -1
+cdef int set_uint8_swap(unsigned char * binbuffer, uint32_t *offset, object var) except -1
+cdef int set_int16_swap(unsigned char * binbuffer, uint32_t *offset, object var) except -1
+cdef int set_uint16_swap(unsigned char * binbuffer, uint32_t *offset, object var) except -1
+cdef int set_int32_swap(unsigned char * binbuffer, uint32_t *offset, object var) except -1
+cdef int set_uint32_swap(unsigned char * binbuffer, uint32_t *offset, object var) except -1
+cdef int set_int64_swap(unsigned char * binbuffer, uint32_t *offset, object var) except -1
+cdef int set_uint64_swap(unsigned char * binbuffer, uint32_t *offset, object var) except -1
+cdef int set_double_swap(unsigned char * binbuffer, uint32_t *offset, object var) except -1
+cdef int set_float_swap(unsigned char * binbuffer, uint32_t *offset, object var) except -1
\ No newline at end of file
@@ -1,136 +1,233 @@
 
+cdef inline void swap_bytes(unsigned char * dst, const unsigned char * src, size_t n) noexcept nogil:
+    """copies n bytes from src to dst in reverse order"""
+    cdef size_t i
+    for i in range(n):
+        dst[i] = src[n - 1 - i]
+
 # int8_t
-cdef variant_container get_int8(const unsigned char * binbuffer, uint32_t *offset):
+cdef variant_container get_int8(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil:
     cdef variant_container var
     var = make_int8_variant((<int8_t*>&binbuffer[offset[0]])[0])
     offset[0] += sizeof(int8_t)
     return var
 
-cdef int set_int8(bytearray buff, object obj) except -1:
-    cdef int i
+cdef int set_int8(unsigned char * binbuffer, uint32_t *offset, object obj) except -1:
+    (<int8_t*>&binbuffer[offset[0]])[0] = obj
+    offset[0] += sizeof(int8_t)
+
+cdef variant_container get_int8_swap(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil:
+    cdef int8_t value
+    swap_bytes(<unsigned char *>&value, &binbuffer[offset[0]], sizeof(int8_t))
+    offset[0] += sizeof(int8_t)
+    return make_int8_variant(value)
+
+cdef int set_int8_swap(unsigned char * binbuffer, uint32_t *offset, object obj) except -1:
     cdef int8_t value = obj
-    for i in range(sizeof(int8_t)):
-        buff.append((<uint8_t *>&value)[i])
+    swap_bytes(&binbuffer[offset[0]], <unsigned char *>&value, sizeof(int8_t))
+    offset[0] += sizeof(int8_t)
 
 # uint8_t
-cdef variant_container get_uint8(const unsigned char * binbuffer, uint32_t *offset):
+cdef variant_container get_uint8(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil:
     cdef variant_container var
     var = make_uint8_variant((<uint8_t*>&binbuffer[offset[0]])[0])
     offset[0] += sizeof(uint8_t)
     return var
 
-cdef int set_uint8(bytearray buff, object obj) except -1:
-    cdef int i
+cdef int set_uint8(unsigned char * binbuffer, uint32_t *offset, object obj) except -1:
+    (<uint8_t*>&binbuffer[offset[0]])[0] = obj
+    offset[0] += sizeof(uint8_t)
+
+cdef variant_container get_uint8_swap(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil:
+    cdef uint8_t value
+    swap_bytes(<unsigned char *>&value, &binbuffer[offset[0]], sizeof(uint8_t))
+    offset[0] += sizeof(uint8_t)
+    return make_uint8_variant(value)
+
+cdef int set_uint8_swap(unsigned char * binbuffer, uint32_t *offset, object obj) except -1:
     cdef uint8_t value = obj
-    for i in range(sizeof(uint8_t)):
-        buff.append((<uint8_t *>&value)[i])
+    swap_bytes(&binbuffer[offset[0]], <unsigned char *>&value, sizeof(uint8_t))
+    offset[0] += sizeof(uint8_t)
 
 # int16_t
-cdef variant_container get_int16(const unsigned char * binbuffer, uint32_t *offset):
+cdef variant_container get_int16(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil:
     cdef variant_container var
     var = make_int16_variant((<int16_t*>&binbuffer[offset[0]])[0])
     offset[0] += sizeof(int16_t)
     return var
 
-cdef int set_int16(bytearray buff, object obj) except -1:
-    cdef int i
+cdef int set_int16(unsigned char * binbuffer, uint32_t *offset, object obj) except -1:
+    (<int16_t*>&binbuffer[offset[0]])[0] = obj
+    offset[0] += sizeof(int16_t)
+
+cdef variant_container get_int16_swap(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil:
+    cdef int16_t value
+    swap_bytes(<unsigned char *>&value, &binbuffer[offset[0]], sizeof(int16_t))
+    offset[0] += sizeof(int16_t)
+    return make_int16_variant(value)
+
+cdef int set_int16_swap(unsigned char * binbuffer, uint32_t *offset, object obj) except -1:
     cdef int16_t value = obj
-    for i in range(sizeof(int16_t)):
-        buff.append((<uint8_t *>&value)[i])
+    swap_bytes(&binbuffer[offset[0]], <unsigned char *>&value, sizeof(int16_t))
+    offset[0] += sizeof(int16_t)
 
 # uint16_t
-cdef variant_container get_uint16(const unsigned char * binbuffer, uint32_t *offset):
+cdef variant_container get_uint16(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil:
     cdef variant_container var
     var = make_uint16_variant((<uint16_t*>&binbuffer[offset[0]])[0])
     offset[0] += sizeof(uint16_t)
     return var
 
-cdef int set_uint16(bytearray buff, object obj) except -1:
-    cdef int i
+cdef int set_uint16(unsigned char * binbuffer, uint32_t *offset, object obj) except -1:
+    (<uint16_t*>&binbuffer[offset[0]])[0] = obj
+    offset[0] += sizeof(uint16_t)
+
+cdef variant_container get_uint16_swap(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil:
+    cdef uint16_t value
+    swap_bytes(<unsigned char *>&value, &binbuffer[offset[0]], sizeof(uint16_t))
+    offset[0] += sizeof(uint16_t)
+    return make_uint16_variant(value)
+
+cdef int set_uint16_swap(unsigned char * binbuffer, uint32_t *offset, object obj) except -1:
     cdef uint16_t value = obj
-    for i in range(sizeof(uint16_t)):
-        buff.append((<uint8_t *>&value)[i])
+    swap_bytes(&binbuffer[offset[0]], <unsigned char *>&value, sizeof(uint16_t))
+    offset[0] += sizeof(uint16_t)
 
 # int32_t
-cdef variant_container get_int32(const unsigned char * binbuffer, uint32_t *offset):
+cdef variant_container get_int32(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil:
     cdef variant_container var
     var = make_int32_variant((<int32_t*>&binbuffer[offset[0]])[0])
     offset[0] += sizeof(int32_t)
     return var
 
-cdef int set_int32(bytearray buff, object obj) except -1:
-    cdef int i
+cdef int set_int32(unsigned char * binbuffer, uint32_t *offset, object obj) except -1:
+    (<int32_t*>&binbuffer[offset[0]])[0] = obj
+    offset[0] += sizeof(int32_t)
+
+cdef variant_container get_int32_swap(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil:
+    cdef int32_t value
+    swap_bytes(<unsigned char *>&value, &binbuffer[offset[0]], sizeof(int32_t))
+    offset[0] += sizeof(int32_t)
+    return make_int32_variant(value)
+
+cdef int set_int32_swap(unsigned char * binbuffer, uint32_t *offset, object obj) except -1:
     cdef int32_t value = obj
-    for i in range(sizeof(int32_t)):
-        buff.append((<uint8_t *>&value)[i])
+    swap_bytes(&binbuffer[offset[0]], <unsigned char *>&value, sizeof(int32_t))
+    offset[0] += sizeof(int32_t)
 
 # uint32_t
-cdef variant_container get_uint32(const unsigned char * binbuffer, uint32_t *offset):
+cdef variant_container get_uint32(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil:
     cdef variant_container var
     var = make_uint32_variant((<uint32_t*>&binbuffer[offset[0]])[0])
     offset[0] += sizeof(uint32_t)
     return var
 
-cdef int set_uint32(bytearray buff, object obj) except -1:
-    cdef int i
+cdef int set_uint32(unsigned char * binbuffer, uint32_t *offset, object obj) except -1:
+    (<uint32_t*>&binbuffer[offset[0]])[0] = obj
+    offset[0] += sizeof(uint32_t)
+
+cdef variant_container get_uint32_swap(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil:
+    cdef uint32_t value
+    swap_bytes(<unsigned char *>&value, &binbuffer[offset[0]], sizeof(uint32_t))
+    offset[0] += sizeof(uint32_t)
+    return make_uint32_variant(value)
+
+cdef int set_uint32_swap(unsigned char * binbuffer, uint32_t *offset, object obj) except -1:
     cdef uint32_t value = obj
-    for i in range(sizeof(uint32_t)):
-        buff.append((<uint8_t *>&value)[i])
+    swap_bytes(&binbuffer[offset[0]], <unsigned char *>&value, sizeof(uint32_t))
+    offset[0] += sizeof(uint32_t)
 
 # int64_t
-cdef variant_container get_int64(const unsigned char * binbuffer, uint32_t *offset):
+cdef variant_container get_int64(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil:
     cdef variant_container var
     var = make_int64_variant((<int64_t*>&binbuffer[offset[0]])[0])
     offset[0] += sizeof(int64_t)
     return var
 
-cdef int set_int64(bytearray buff, object obj) except -1:
-    cdef int i
+cdef int set_int64(unsigned char * binbuffer, uint32_t *offset, object obj) except -1:
+    (<int64_t*>&binbuffer[offset[0]])[0] = obj
+    offset[0] += sizeof(int64_t)
+
+cdef variant_container get_int64_swap(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil:
+    cdef int64_t value
+    swap_bytes(<unsigned char *>&value, &binbuffer[offset[0]], sizeof(int64_t))
+    offset[0] += sizeof(int64_t)
+    return make_int64_variant(value)
+
+cdef int set_int64_swap(unsigned char * binbuffer, uint32_t *offset, object obj) except -1:
     cdef int64_t value = obj
-    for i in range(sizeof(int64_t)):
-        buff.append((<uint8_t *>&value)[i])
+    swap_bytes(&binbuffer[offset[0]], <unsigned char *>&value, sizeof(int64_t))
+    offset[0] += sizeof(int64_t)
 
 # uint64_t
-cdef variant_container get_uint64(const unsigned char * binbuffer, uint32_t *offset):
+cdef variant_container get_uint64(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil:
     cdef variant_container var
     var = make_uint64_variant((<uint64_t*>&binbuffer[offset[0]])[0])
     offset[0] += sizeof(uint64_t)
     return var
 
-cdef int set_uint64(bytearray buff, object obj) except -1:
-    cdef int i
+cdef int set_uint64(unsigned char * binbuffer, uint32_t *offset, object obj) except -1:
+    (<uint64_t*>&binbuffer[offset[0]])[0] = obj
+    offset[0] += sizeof(uint64_t)
+
+cdef variant_container get_uint64_swap(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil:
+    cdef uint64_t value
+    swap_bytes(<unsigned char *>&value, &binbuffer[offset[0]], sizeof(uint64_t))
+    offset[0] += sizeof(uint64_t)
+    return make_uint64_variant(value)
+
+cdef int set_uint64_swap(unsigned char * binbuffer, uint32_t *offset, object obj) except -1:
     cdef uint64_t value = obj
-    for i in range(sizeof(uint64_t)):
-        buff.append((<uint8_t *>&value)[i])
+    swap_bytes(&binbuffer[offset[0]], <unsigned char *>&value, sizeof(uint64_t))
+    offset[0] += sizeof(uint64_t)
 
 # double
-cdef variant_container get_double(const unsigned char * binbuffer, uint32_t *offset):
+cdef variant_container get_double(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil:
     cdef variant_container var
     var = make_double_variant((<double*>&binbuffer[offset[0]])[0])
     offset[0] += sizeof(double)
     return var
 
-cdef int set_double(bytearray buff, object obj) except -1:
-    cdef int i
+cdef int set_double(unsigned char * binbuffer, uint32_t *offset, object obj) except -1:
+    (<double*>&binbuffer[offset[0]])[0] = obj
+    offset[0] += sizeof(double)
+
+cdef variant_container get_double_swap(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil:
+    cdef double value
+    swap_bytes(<unsigned char *>&value, &binbuffer[offset[0]], sizeof(double))
+    offset[0] += sizeof(double)
+    return make_double_variant(value)
+
+cdef int set_double_swap(unsigned char * binbuffer, uint32_t *offset, object obj) except -1:
     cdef double value = obj
-    for i in range(sizeof(double)):
-        buff.append((<uint8_t *>&value)[i])
+    swap_bytes(&binbuffer[offset[0]], <unsigned char *>&value, sizeof(double))
+    offset[0] += sizeof(double)
 
 # float
-cdef variant_container get_float(const unsigned char * binbuffer, uint32_t *offset):
+cdef variant_container get_float(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil:
     cdef variant_container var
     var = make_float_variant((<float*>&binbuffer[offset[0]])[0])
     offset[0] += sizeof(float)
     return var
 
-cdef int set_float(bytearray buff, object obj) except -1:
-    cdef int i
+cdef int set_float(unsigned char * binbuffer, uint32_t *offset, object obj) except -1:
+    (<float*>&binbuffer[offset[0]])[0] = obj
+    offset[0] += sizeof(float)
+
+cdef variant_container get_float_swap(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil:
+    cdef float value
+    swap_bytes(<unsigned char *>&value, &binbuffer[offset[0]], sizeof(float))
+    offset[0] += sizeof(float)
+    return make_float_variant(value)
+
+cdef int set_float_swap(unsigned char * binbuffer, uint32_t *offset, object obj) except -1:
     cdef float value = obj
-    for i in range(sizeof(float)):
-        buff.append((<uint8_t *>&value)[i])
+    swap_bytes(&binbuffer[offset[0]], <unsigned char *>&value, sizeof(float))
+    offset[0] += sizeof(float)
 
 
 if __name__ == "__main__":
+    # prints the serializers above, run this block with plain Python to regenerate them
     types = []
     for i in [8,16,32,64]:
         for s in ['','u']:
@@ -139,17 +236,33 @@ if __name__ == "__main__":
     types.append(['double', ''])
     types.append(['float', ''])
 
+    print('''
+cdef inline void swap_bytes(unsigned char * dst, const unsigned char * src, size_t n) noexcept nogil:
+    """copies n bytes from src to dst in reverse order"""
+    cdef size_t i
+    for i in range(n):
+        dst[i] = src[n - 1 - i]''')
+
     for p,s in types:
             print("""
-    # {0}{1}
-    cdef variant_container get_{0}(const unsigned char * binbuffer, uint32_t *offset):
-        cdef variant_container var
-        var = make_{0}_variant((<{0}{1}*>&binbuffer[offset[0]])[0])
-        offset[0] += sizeof({0}{1})
-        return var
-
-    cdef int set_{0}(bytearray buff, object obj) except -1:
-        cdef int i
-        cdef {0}{1} value = obj
-        for i in range(sizeof({0}{1})):
-            buff.append((<uint8_t *>&value)[i])""".format(p,s))
+# {0}{1}
+cdef variant_container get_{0}(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil:
+    cdef variant_container var
+    var = make_{0}_variant((<{0}{1}*>&binbuffer[offset[0]])[0])
+    offset[0] += sizeof({0}{1})
+    return var
+
+cdef int set_{0}(unsigned char * binbuffer, uint32_t *offset, object obj) except -1:
+    (<{0}{1}*>&binbuffer[offset[0]])[0] = obj
+    offset[0] += sizeof({0}{1})
+
+cdef variant_container get_{0}_swap(const unsigned char * binbuffer, uint32_t *offset) noexcept nogil:
+    cdef {0}{1} value
+    swap_bytes(<unsigned char *>&value, &binbuffer[offset[0]], sizeof({0}{1}))
+    offset[0] += sizeof({0}{1})
+    return make_{0}_variant(value)
+
+cdef int set_{0}_swap(unsigned char * binbuffer, uint32_t *offset, object obj) except -1:
+    cdef {0}{1} value = obj
+    swap_bytes(&binbuffer[offset[0]], <unsigned char *>&value, sizeof({0}{1}))
+    offset[0] += sizeof({0}{1})""".format(p,s))
@@ -28,18 +28,19 @@ cdef struct variant_container:
     variant_type type
     variant_union value
 
-cdef variant_container make_int8_variant(int8_t value) nogil
-cdef variant_container make_uint8_variant(uint8_t value) nogil
-cdef variant_container make_int16_variant(int16_t value) nogil
-cdef variant_container make_uint16_variant(uint16_t value) nogil
-cdef variant_container make_int32_variant(int32_t value) nogil
-cdef variant_container make_uint32_variant(uint32_t value) nogil
-cdef variant_container make_int64_variant(int64_t value) nogil
-cdef variant_container make_uint64_variant(uint64_t value) nogil
-cdef variant_container make_double_variant(double value) nogil
-cdef variant_container make_float_variant(float value) nogil
+cdef variant_container make_int8_variant(int8_t value) noexcept nogil
+cdef variant_container make_uint8_variant(uint8_t value) noexcept nogil
+cdef variant_container make_int16_variant(int16_t value) noexcept nogil
+cdef variant_container make_uint16_variant(uint16_t value) noexcept nogil
+cdef variant_container make_int32_variant(int32_t value) noexcept nogil
+cdef variant_container make_uint32_variant(uint32_t value) noexcept nogil
+cdef variant_container make_int64_variant(int64_t value) noexcept nogil
+cdef variant_container make_uint64_variant(uint64_t value) noexcept nogil
+cdef variant_container make_double_variant(double value) noexcept nogil
+cdef variant_container make_float_variant(float value) noexcept nogil
 
 cdef object make_object_from_variant(variant_container var)
+cdef int64_t integer_from_variant(variant_container var) noexcept nogil
 
 cdef class PyVariant(object):
     cdef public variant_container _var
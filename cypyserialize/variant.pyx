@@ -1,59 +1,59 @@
 
-cdef variant_container make_int8_variant(int8_t value) nogil:
+cdef variant_container make_int8_variant(int8_t value) noexcept nogil:
     cdef variant_container var
     var.type = INT8
     var.value.var_int8 = value
     return var
 
-cdef variant_container make_uint8_variant(uint8_t value) nogil:
+cdef variant_container make_uint8_variant(uint8_t value) noexcept nogil:
     cdef variant_container var
     var.type = UINT8
     var.value.var_uint8 = value
     return var
 
-cdef variant_container make_int16_variant(int16_t value) nogil:
+cdef variant_container make_int16_variant(int16_t value) noexcept nogil:
     cdef variant_container var
     var.type = INT16
     var.value.var_int16 = value
     return var
 
-cdef variant_container make_uint16_variant(uint16_t value) nogil:
+cdef variant_container make_uint16_variant(uint16_t value) noexcept nogil:
     cdef variant_container var
     var.type = UINT16
     var.value.var_uint16 = value
     return var
 
-cdef variant_container make_int32_variant(int32_t value) nogil:
+cdef variant_container make_int32_variant(int32_t value) noexcept nogil:
     cdef variant_container var
     var.type = INT32
     var.value.var_int32 = value
     return var
 
-cdef variant_container make_uint32_variant(uint32_t value) nogil:
+cdef variant_container make_uint32_variant(uint32_t value) noexcept nogil:
     cdef variant_container var
     var.type = UINT32
     var.value.var_uint32 = value
     return var
 
-cdef variant_container make_int64_variant(int64_t value) nogil:
+cdef variant_container make_int64_variant(int64_t value) noexcept nogil:
     cdef variant_container var
     var.type = INT64
     var.value.var_int64 = value
     return var
 
-cdef variant_container make_uint64_variant(uint64_t value) nogil:
+cdef variant_container make_uint64_variant(uint64_t value) noexcept nogil:
     cdef variant_container var
     var.type = UINT64
     var.value.var_uint64 = value
     return var
 
-cdef variant_container make_double_variant(double value) nogil:
+cdef variant_container make_double_variant(double value) noexcept nogil:
     cdef variant_container var
     var.type = DOUBLE
     var.value.var_double = value
     return var
 
-cdef variant_container make_float_variant(float value) nogil:
+cdef variant_container make_float_variant(float value) noexcept nogil:
     cdef variant_container var
     var.type = FLOAT
     var.value.var_float = value
@@ -81,6 +81,29 @@ cdef object make_object_from_variant(variant_container var):
     elif var.type == FLOAT:
         return var.value.var_float
 
+cdef int64_t integer_from_variant(variant_container var) noexcept nogil:
+    """Value of an integer variant without creating a Python object, floats are truncated"""
+    if var.type == INT8:
+        return var.value.var_int8
+    elif var.type == UINT8:
+        return var.value.var_uint8
+    elif var.type == INT16:
+        return var.value.var_int16
+    elif var.type == UINT16:
+        return var.value.var_uint16
+    elif var.type == INT32:
+        return var.value.var_int32
+    elif var.type == UINT32:
+        return var.value.var_uint32
+    elif var.type == INT64:
+        return var.value.var_int64
+    elif var.type == UINT64:
+        return <int64_t>var.value.var_uint64
+    elif var.type == DOUBLE:
+        return <int64_t>var.value.var_double
+    else:
+        return <int64_t>var.value.var_float
+
 cdef class PyVariant(object):
 
     def __cinit(self, variant_container var):
@@ -1,3 +1,4 @@
+import sys
 from distutils.core import setup
 from distutils.extension import Extension
 
@@ -31,6 +32,18 @@ LICENSE = "Apache 2.0"
 SRC_DIR = ".\\" + NAME
 PACKAGES = [NAME]
 
+# OpenMP lets unpack_batch decode on several threads, without it it runs on one
+if sys.platform == 'win32':
+    OPENMP_COMPILE_ARGS = ['/openmp']
+    OPENMP_LINK_ARGS = []
+elif sys.platform == 'darwin':
+    # Apple's clang doesn't ship OpenMP
+    OPENMP_COMPILE_ARGS = []
+    OPENMP_LINK_ARGS = []
+else:
+    OPENMP_COMPILE_ARGS = ['-fopenmp']
+    OPENMP_LINK_ARGS = ['-fopenmp']
+
 EXTENSIONS = [
     Extension(
         "variant",
@@ -45,7 +58,9 @@ EXTENSIONS = [
     Extension(
         "serializable",
         [SRC_DIR + '/serializable' + EXT],
-        libraries=[]
+        libraries=[],
+        extra_compile_args=OPENMP_COMPILE_ARGS,
+        extra_link_args=OPENMP_LINK_ARGS
     )
 ]
 
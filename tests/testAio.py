@@ -0,0 +1,106 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import asyncio
+import socket
+import struct
+import sys
+import unittest
+
+sys.path.append("..\\")
+
+import cypyserialize
+from cypyserialize.aio import MessageProtocol, read_messages, write_messages
+
+
+class Point(cypyserialize.SerializableObject):
+    "Basic point class"
+    x = cypyserialize.double()
+    y = cypyserialize.double()
+
+
+class Path(cypyserialize.SerializableObject):
+    points = cypyserialize.SerializableArray(
+        Point(),
+        count=cypyserialize.uint()
+    )
+
+
+class SignedPath(cypyserialize.SerializableObject):
+    points = cypyserialize.SerializableArray(
+        Point(),
+        count=cypyserialize.sint()
+    )
+
+
+class AioTests(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.rsock, self.wsock = socket.socketpair()
+
+    async def asyncTearDown(self):
+        self.rsock.close()
+        self.wsock.close()
+
+    async def testReadMessages(self):
+        reader, _ = await asyncio.open_connection(sock=self.rsock)
+        # records split across sends
+        data = b''.join(struct.pack('=I', i) + struct.pack('dd', i, -i) * i for i in range(50))
+        self.wsock.sendall(data[:7])
+        self.wsock.sendall(data[7:])
+        self.wsock.close()
+        paths = [path async for path in read_messages(reader, Path, chunk_size=100)]
+        self.assertEqual([len(path.points) for path in paths], list(range(50)))
+        self.assertEqual(paths[-1].points[3].y, -49.0)
+
+    async def testReadMessagesTruncated(self):
+        reader, _ = await asyncio.open_connection(sock=self.rsock)
+        self.wsock.sendall(struct.pack('ddd', 0.0, 10.0, 15.0))
+        self.wsock.close()
+        with self.assertRaises(EOFError):
+            async for point in read_messages(reader, Point):
+                pass
+
+    async def testWriteMessages(self):
+        _, writer = await asyncio.open_connection(sock=self.wsock)
+        await write_messages(writer, [Point(i, -i) for i in range(10)])
+        writer.close()
+        await writer.wait_closed()
+        data = b''
+        while len(data) < 160:
+            data += self.rsock.recv(160)
+        self.assertEqual(data, b''.join(struct.pack('dd', i, -i) for i in range(10)))
+
+    async def testProtocol(self):
+        loop = asyncio.get_running_loop()
+        received = []
+
+        async def serve(reader, writer):
+            await write_messages(writer, [Point(i, -i) for i in range(3000)])
+            writer.close()
+
+        server = await asyncio.start_server(serve, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        _, protocol = await loop.create_connection(lambda: MessageProtocol(Point, high_water=100), '127.0.0.1', port)
+        async for point in protocol:
+            received.append(point.x)
+        server.close()
+        await server.wait_closed()
+        self.assertEqual(received, [float(i) for i in range(3000)])
+
+    async def testProtocolError(self):
+        loop = asyncio.get_running_loop()
+        received = []
+        # a valid record followed by one with a negative count, the connection stays open
+        self.wsock.sendall(struct.pack('=i', 1) + struct.pack('dd', 1.0, -1.0) + struct.pack('=i', -1))
+        _, protocol = await loop.create_connection(lambda: MessageProtocol(SignedPath), sock=self.rsock)
+        with self.assertRaises(ValueError):
+            async for path in protocol:
+                received.append(path.points[0].x)
+        self.assertEqual(received, [1.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,252 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import os
+import sys
+import struct
+import tempfile
+import unittest
+
+sys.path.append("..\\")
+
+import cypyserialize
+
+
+class Point(cypyserialize.SerializableObject):
+    "Basic point class"
+    x = cypyserialize.double()
+    y = cypyserialize.double()
+
+
+class Path(cypyserialize.SerializableObject):
+    points = cypyserialize.SerializableArray(
+        Point(),
+        count=cypyserialize.uint()
+    )
+
+
+class Frame(cypyserialize.SerializableObject):
+    STX = cypyserialize.uchar(value=0x02)
+    points = cypyserialize.SerializableArray(
+        Point(),
+        count=cypyserialize.uint()
+    )
+
+
+class SignedFrame(cypyserialize.SerializableObject):
+    STX = cypyserialize.uchar(value=0x02)
+    points = cypyserialize.SerializableArray(
+        Point(),
+        count=cypyserialize.sint()
+    )
+
+
+class Track(cypyserialize.SerializableObject):
+    timestamp = cypyserialize.uint()
+    points = cypyserialize.SerializableArray(
+        Point(),
+        count=cypyserialize.ushort()
+    )
+
+
+def count(records):
+    return sum(1 for record in records)
+
+
+class RecordFileTests(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        with os.fdopen(fd, 'wb') as f:
+            for i in range(10):
+                f.write(struct.pack('dd', i, i * 10.0))
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def testLen(self):
+        with cypyserialize.RecordFile(Point, self.path) as records:
+            self.assertEqual(len(records), 10)
+
+    def testGetItem(self):
+        with cypyserialize.RecordFile(Point, self.path) as records:
+            p = records[3]
+            self.assertEqual((p.x, p.y), (3.0, 30.0))
+            self.assertEqual(records[-1].y, 90.0)
+            del p
+            self.assertRaises(IndexError, records.__getitem__, 10)
+
+    def testSlice(self):
+        with cypyserialize.RecordFile(Point, self.path) as records:
+            self.assertEqual([p.x for p in records[2:8:3]], [2.0, 5.0])
+
+    def testIter(self):
+        with cypyserialize.RecordFile(Point, self.path, lazy=False) as records:
+            self.assertEqual([p.x for p in records], [float(i) for i in range(10)])
+
+    def testWriteThrough(self):
+        with cypyserialize.RecordFile(Point, self.path, mode='r+') as records:
+            p = records[4]
+            p.y = -1.0
+            del p
+        with open(self.path, 'rb') as f:
+            f.seek(4 * 16)
+            self.assertEqual(struct.unpack('dd', f.read(16)), (4.0, -1.0))
+
+    def testEmptyFile(self):
+        with open(self.path, 'wb'):
+            pass
+        with cypyserialize.RecordFile(Point, self.path) as records:
+            self.assertEqual(len(records), 0)
+            self.assertEqual(list(records), [])
+
+    def testVariableLengthRaises(self):
+        self.assertRaises(TypeError, cypyserialize.RecordFile, Path, self.path)
+
+
+def write_tracks(path, timestamps, mode='wb'):
+    with open(path, mode) as f:
+        for t in timestamps:
+            f.write(struct.pack('=IH', t, t % 5))
+            for j in range(t % 5):
+                f.write(struct.pack('dd', t, j))
+
+
+class RecordIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+        write_tracks(self.path, range(0, 200, 2))
+
+    def tearDown(self):
+        for path in (self.path, self.path + '.idx'):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def testIndex(self):
+        with cypyserialize.RecordIndex(Track, self.path, keys=['timestamp']) as index:
+            self.assertEqual(len(index), 100)
+            self.assertEqual(index.end, os.path.getsize(self.path))
+            t = index[37]
+            self.assertEqual((t.timestamp, len(t.points)), (74, 4))
+            self.assertEqual(t.points[3].y, 3.0)
+            self.assertEqual(index[-1].timestamp, 198)
+            self.assertEqual([t.timestamp for t in index][:3], [0, 2, 4])
+            self.assertEqual(list(index.columns['timestamp'][:3]), [0, 2, 4])
+            self.assertRaises(IndexError, index.__getitem__, 100)
+        self.assertTrue(os.path.exists(self.path + '.idx'))
+
+    def testSeek(self):
+        with cypyserialize.RecordIndex(Track, self.path, keys=['timestamp']) as index:
+            self.assertEqual(index.seek('timestamp', 10, 20), range(5, 10))
+            self.assertEqual(index.seek('timestamp', 11, 20), range(6, 10))
+            self.assertEqual(index.seek('timestamp', 10), range(5, 6))
+            self.assertEqual(index.seek('timestamp', 11), range(6, 6))
+            self.assertEqual(index.seek('timestamp', 500, 600), range(100, 100))
+
+    def testIncremental(self):
+        with cypyserialize.RecordIndex(Track, self.path, keys=['timestamp']) as index:
+            pass
+        # a partial record at the end is left for the next update
+        write_tracks(self.path, range(200, 210), mode='ab')
+        with open(self.path, 'ab') as f:
+            f.write(struct.pack('=IH', 210, 3))
+        with cypyserialize.RecordIndex(Track, self.path, keys=['timestamp']) as index:
+            self.assertEqual(len(index), 110)
+            self.assertEqual(index[-1].timestamp, 209)
+            with open(self.path, 'ab') as f:
+                f.write(struct.pack('dddddd', 0, 1, 2, 3, 4, 5))
+            self.assertEqual(index.update(), 1)
+            self.assertEqual(index[-1].points[2].y, 5.0)
+
+        # rewritten files are indexed again from the start
+        write_tracks(self.path, range(1, 100, 2))
+        with cypyserialize.RecordIndex(Track, self.path, keys=['timestamp']) as index:
+            self.assertEqual(len(index), 50)
+            self.assertEqual(index[0].timestamp, 1)
+
+    def testTruncated(self):
+        with cypyserialize.RecordIndex(Track, self.path, keys=['timestamp']) as index:
+            open(self.path, 'wb').close()
+            self.assertEqual(index.update(), 0)
+            self.assertEqual(len(index), 0)
+            self.assertEqual(len(index.columns['timestamp']), 0)
+            self.assertRaises(IndexError, index.__getitem__, 0)
+        with cypyserialize.RecordIndex(Track, self.path, keys=['timestamp']) as index:
+            self.assertEqual((len(index), index.end), (0, 0))
+
+        # rewritten with only part of a record
+        write_tracks(self.path, range(10))
+        with cypyserialize.RecordIndex(Track, self.path) as index:
+            with open(self.path, 'wb') as f:
+                f.write(struct.pack('=IH', 0, 3))
+            self.assertEqual(index.update(), 0)
+            self.assertEqual(len(index), 0)
+        with cypyserialize.RecordIndex(Track, self.path) as index:
+            self.assertEqual(len(index), 0)
+
+    def testKeyNotFixed(self):
+        self.assertRaises(TypeError, cypyserialize.RecordIndex, Track, self.path, keys=['points'])
+
+    def testParallelDecode(self):
+        with cypyserialize.RecordIndex(Track, self.path) as index:
+            self.assertEqual(index.chunks(1 << 20), [(0, index.end)])
+            chunks = index.chunks(100)
+            self.assertEqual(chunks[0][0], 0)
+            self.assertEqual(chunks[-1][1], index.end)
+            self.assertTrue(all(start in index.offsets for start, end in chunks))
+            tracks = list(cypyserialize.parallel_decode(Track, self.path, workers=2, chunk_size=100, index=index))
+        self.assertEqual([t.timestamp for t in tracks], list(range(0, 200, 2)))
+
+
+class ParallelDecodeTests(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def testFixedSize(self):
+        with open(self.path, 'wb') as f:
+            for i in range(1000):
+                f.write(struct.pack('dd', i, i * 10.0))
+        points = list(cypyserialize.parallel_decode(Point, self.path, workers=2, chunk_size=1000))
+        self.assertEqual([p.x for p in points], [float(i) for i in range(1000)])
+
+    def testReducer(self):
+        with open(self.path, 'wb') as f:
+            for i in range(1000):
+                f.write(struct.pack('dd', i, i * 10.0))
+        counts = list(cypyserialize.parallel_decode(Point, self.path, workers=2, reducer=count, chunk_size=1600))
+        self.assertEqual(counts, [100] * 10)
+
+    def testSync(self):
+        with open(self.path, 'wb') as f:
+            for i in range(300):
+                f.write(struct.pack('=BI', 2, i % 4))
+                for j in range(i % 4):
+                    f.write(struct.pack('dd', i, j))
+        frames = list(cypyserialize.parallel_decode(Frame, self.path, workers=2, sync='STX', chunk_size=256))
+        self.assertEqual(len(frames), 300)
+        self.assertEqual([len(frame.points) for frame in frames], [i % 4 for i in range(300)])
+        self.assertEqual(frames[-1].points[2].x, 299.0)
+
+    def testSyncSkipsFalseMarkers(self):
+        # a marker byte in the payload, followed by what reads as a negative count
+        x, = struct.unpack('d', b'\x02\xff\xff\xff\xff\x00\x10\x40')
+        with open(self.path, 'wb') as f:
+            for i in range(100):
+                f.write(struct.pack('=Bidd', 2, 1, x, i))
+        frames = list(cypyserialize.parallel_decode(SignedFrame, self.path, workers=2, sync='STX', chunk_size=10))
+        self.assertEqual([frame.points[0].y for frame in frames], [float(i) for i in range(100)])
+
+    def testVariableLengthNeedsSync(self):
+        self.assertRaises(TypeError, cypyserialize.parallel_decode, Path, self.path)
+
+if __name__ == '__main__':
+    unittest.main()
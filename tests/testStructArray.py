@@ -6,6 +6,8 @@ from __future__ import unicode_literals
 import unittest
 import struct
 import sys
+import io
+import gc
 
 sys.path.append("..\\")
 
@@ -46,17 +48,132 @@ class structArrayTests(unittest.TestCase):
         p.points.append(0.0, 10.0)
         self.assertEqual(list(p.points[0].items()), [('x', 0.0), ('y', 10.0)])
 
+    def testArrayPerInstance(self):
+        p1 = Path()
+        points = p1.points
+        p2 = Path()
+        p2.points.append(0.0, 10.0)
+        self.assertEqual(len(points), 0)
+        self.assertIs(points, p1.points)
+        first = p2.points[0]
+        p2.points.append(10.0, 20.0)
+        first.x = 5.0
+        self.assertEqual(p2.points[0].x, 5.0)
+
     def testPack(self):
         p = Path()
         p.points.append(0.0, 10.0)
         self.assertEqual(p.pack(), struct.pack('<Idd', 1, 0.0, 10.0))
 
+    def testPackInto(self):
+        p = Path()
+        p.points.append(0.0, 10.0)
+        p.points.append(10.0, 20.0)
+        buff = bytearray(40)
+        self.assertEqual(p.pack_into(buff), 36)
+        self.assertEqual(bytes(buff[:36]), struct.pack('<Idddd', 2, 0.0, 10.0, 10.0, 20.0))
+
     def testUnpack(self):
         s = struct.pack('<Idddd', 2, 0.0, 10.0, 10.0, 20.0)
         p = Path(s)
         self.assertEqual(list(p.points[0].items()), [('x', 0.0), ('y', 10.0)])
         self.assertEqual(list(p.points[1].items()), [('x', 10.0), ('y', 20.0)])
 
+    def testUnpackTruncated(self):
+        s = struct.pack('<Iddd', 2, 0.0, 10.0, 10.0)
+        with self.assertRaises(cypyserialize.TruncatedError) as cm:
+            Path(s)
+        self.assertEqual(cm.exception.field, 'points')
+        self.assertEqual(cm.exception.needed, 36)
+        self.assertRaises(cypyserialize.TruncatedError, Path, b'\x02\x00')
+
+    def testUnpackNegativeCount(self):
+        class Signed(cypyserialize.SerializableObject):
+            values = cypyserialize.SerializableArray(cypyserialize.double(), count=cypyserialize.sint())
+            points = cypyserialize.SerializableArray(Point(), count=cypyserialize.short())
+
+        s = struct.pack('=i', -1) + struct.pack('=h', 0) + b'\x00' * 64
+        self.assertRaises(ValueError, Signed, s)
+        self.assertRaises(ValueError, Signed, struct.pack('=ih', 0, -2) + b'\x00' * 64)
+        self.assertRaises(ValueError, list, Signed.iter_unpack(s))
+
+    def testIterUnpack(self):
+        s = struct.pack('<Idddd', 2, 0.0, 10.0, 10.0, 20.0) + \
+            struct.pack('<I', 0) + \
+            struct.pack('<Idd', 1, 5.0, 6.0)
+        paths = list(Path.iter_unpack(io.BytesIO(s), chunk_size=3))
+        self.assertEqual([len(p.points) for p in paths], [2, 0, 1])
+        self.assertEqual(paths[2].points[0].y, 6.0)
+        self.assertEqual([len(p.points) for p in Path.iter_unpack(s)], [2, 0, 1])
+
+    def testIterUnpackTruncated(self):
+        s = struct.pack('<Iddd', 2, 0.0, 10.0, 10.0)
+        with self.assertRaises(EOFError):
+            list(Path.iter_unpack(s))
+
+    def testView(self):
+        s = struct.pack('<Idddddd', 6, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0)
+        d = DoubleList.view(s)
+        self.assertEqual(d.count, 6)
+        self.assertEqual(d.doubles[:], [1.0, 2.0, 3.0, 4.0, 5.0, 6.0])
+
+    def testViewAssign(self):
+        s = bytearray(struct.pack('<Idddddd', 6, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0))
+        d = DoubleList.view(s)
+        d.doubles = [6.0, 5.0, 4.0, 3.0, 2.0, 1.0]
+        self.assertEqual(s, struct.pack('<Idddddd', 6, 6.0, 5.0, 4.0, 3.0, 2.0, 1.0))
+        self.assertRaises(ValueError, setattr, d, 'doubles', [1.0])
+        self.assertRaises(TypeError, setattr, DoubleList.view(bytes(s)), 'doubles', [0.0] * 6)
+
+    def testViewVariableLengthRaises(self):
+        self.assertRaises(TypeError, Path.view, struct.pack('<I', 0))
+
+    def testBigEndian(self):
+        class BigPath(cypyserialize.SerializableObject):
+            _byte_order = cypyserialize.big_endian
+            points = cypyserialize.SerializableArray(
+                Point(),
+                count=cypyserialize.uint()
+            )
+            values = cypyserialize.SerializableArray(cypyserialize.ushort(), 2)
+        s = struct.pack('>IddddHH', 2, 0.0, 10.0, 10.0, 20.0, 1, 2)
+        p = BigPath(s)
+        self.assertEqual(list(p.points[1].items()), [('x', 10.0), ('y', 20.0)])
+        self.assertEqual(p.values[:], [1, 2])
+        self.assertEqual(p.pack(), s)
+
+    def testTypedStorage(self):
+        s = struct.pack('=I6d', 6, *range(6))
+        d = DoubleList(s)
+        self.assertEqual(d.doubles[:], [float(i) for i in range(6)])
+        self.assertEqual(memoryview(d.doubles).format, 'd')
+        self.assertEqual(memoryview(d.doubles).tolist(), [float(i) for i in range(6)])
+        self.assertEqual(d.pack(), s)
+
+    def testTypedStorageAssignList(self):
+        d = DoubleList()
+        d.doubles = [1, 2, 3, 4, 5, 6]
+        memoryview(d.doubles)[0] = 10.0
+        self.assertEqual(d.doubles[0], 10.0)
+        self.assertEqual(d.pack(), struct.pack('=I6d', 6, 10, 2, 3, 4, 5, 6))
+
+    def testTypedStorageBigEndian(self):
+        class Samples(cypyserialize.SerializableObject):
+            _byte_order = cypyserialize.big_endian
+            values = cypyserialize.SerializableArray(
+                cypyserialize.ushort(),
+                count=cypyserialize.uint()
+            )
+        s = struct.pack('>I3H', 3, 1, 2, 0x0102)
+        o = Samples(s)
+        self.assertEqual(o.values[:], [1, 2, 0x0102])
+        self.assertEqual(o.pack(), s)
+
+    def testObjectArrayHasNoBuffer(self):
+        p = Path()
+        p.points.append(0.0, 10.0)
+        self.assertRaises(BufferError, memoryview, p.points)
+
     def testObjectTypeStructFieldWOLenIssue6(self):
         class generic_string(cypyserialize.SerializableObject):
             text = cypyserialize.SerializableArray(
@@ -86,5 +203,125 @@ class structArrayTests(unittest.TestCase):
         d.doubles[0] = 3.14
         self.assertEqual(d.doubles[0], 3.14)
 
+    def testUnpackInto(self):
+        p = Path()
+        p.points.extend([(0.0, 1.0), (2.0, 3.0)])
+        first = p.points[0]
+        p.unpack_into(struct.pack('=I6d', 3, 4, 5, 6, 7, 8, 9))
+        self.assertEqual((first.x, first.y), (4.0, 5.0))
+        self.assertEqual([pt.y for pt in p.points], [5.0, 7.0, 9.0])
+        p.unpack_into(struct.pack('=I2d', 1, 10, 11))
+        self.assertEqual([pt.x for pt in p.points], [10.0])
+
+        d = DoubleList(struct.pack('=I6d', 6, 0, 1, 2, 3, 4, 5))
+        samples = memoryview(d.doubles)
+        d.unpack_into(struct.pack('=I6d', 6, 5, 4, 3, 2, 1, 0))
+        self.assertEqual(samples.tolist(), [5.0, 4.0, 3.0, 2.0, 1.0, 0.0])
+
+    def testKeepPacked(self):
+        class KeptPath(Path):
+            _keep_packed = True
+
+        p = KeptPath()
+        p.points.extend([(0.0, 1.0), (2.0, 3.0)])
+        frame = p.packed_view()
+        p.points[1].y = 4.0
+        self.assertEqual(p.pack(), struct.pack('=I4d', 2, 0, 1, 2, 4))
+        self.assertEqual(frame, struct.pack('=I4d', 2, 0, 1, 2, 4))
+        p.points.append((5.0, 6.0))
+        self.assertEqual(p.packed_view(), struct.pack('=I6d', 3, 0, 1, 2, 4, 5, 6))
+        self.assertEqual(frame, struct.pack('=I4d', 2, 0, 1, 2, 4))
+
+    def testToDict(self):
+        p = Path()
+        p.points.extend([(0.0, 1.0), (2.0, 3.0)])
+        self.assertEqual(p.to_tuple(), ([(0.0, 1.0), (2.0, 3.0)],))
+        self.assertEqual(p.to_dict(), {'points': [{'x': 0.0, 'y': 1.0}, {'x': 2.0, 'y': 3.0}]})
+        self.assertEqual(Path.from_dict(p.to_dict()).pack(), p.pack())
+        self.assertEqual(DoubleList(struct.pack('=I6d', 6, 0, 1, 2, 3, 4, 5)).to_tuple(), (6, [0.0, 1.0, 2.0, 3.0, 4.0, 5.0]))
+
+        data = struct.pack('=I2d', 1, 4, 5) + struct.pack('=I', 0)
+        self.assertEqual(Path.decode_records(data), [([(4.0, 5.0)],), ([],)])
+
+    def testInstrumentation(self):
+        class Stamped(cypyserialize.SerializableObject):
+            timestamp = cypyserialize.uint(getter=int, setter=int)
+
+        # a collection during a sampled call would count the blocks it frees
+        gc.collect()
+        gc.disable()
+        cypyserialize.reset_instrumentation()
+        cypyserialize.enable_instrumentation(sample_every=1)
+        try:
+            p = Path()
+            p.points.extend([(0.0, 1.0), (2.0, 3.0)])
+            data = p.pack()
+            Path(data)
+            list(Path.iter_unpack(data * 2))
+            s = Stamped(timestamp=10.5)
+            self.assertEqual(s.timestamp, 10)
+        finally:
+            cypyserialize.disable_instrumentation()
+            gc.enable()
+        p.pack()
+
+        stats = cypyserialize.instrumentation_stats()
+        self.assertEqual(stats['Path']['pack']['calls'], 1)
+        self.assertEqual(stats['Path']['pack']['bytes'], len(data))
+        self.assertEqual(stats['Path']['unpack']['calls'], 3)
+        self.assertEqual(stats['Path']['unpack']['bytes'], 3 * len(data))
+        self.assertEqual(stats['Path']['unpack']['sampled'], 3)
+        self.assertGreater(stats['Path']['unpack']['allocations'], 0)
+        self.assertGreaterEqual(stats['Path']['unpack']['total_ns'], stats['Path']['unpack']['max_ns'])
+        self.assertEqual(stats['Path.points']['unpack']['bytes'], 3 * len(data))
+        self.assertEqual(stats[Stamped.__qualname__ + '.timestamp']['get']['calls'], 1)
+        self.assertEqual(stats[Stamped.__qualname__ + '.timestamp']['set']['calls'], 1)
+        cypyserialize.reset_instrumentation()
+        self.assertEqual(cypyserialize.instrumentation_stats(), {})
+
+    def testExtend(self):
+        p = Path()
+        p.points.extend([(0.0, 1.0), [2.0, 3.0], {'y': 5.0, 'x': 4.0}, Point(6.0, 7.0)])
+        self.assertEqual([(pt.x, pt.y) for pt in p.points], [(0.0, 1.0), (2.0, 3.0), (4.0, 5.0), (6.0, 7.0)])
+        self.assertEqual(p.points.size, 64)
+        self.assertEqual(p.pack(), struct.pack('=I8d', 4, 0, 1, 2, 3, 4, 5, 6, 7))
+        with self.assertRaises(TypeError):
+            p.points.extend([(1.0, 2.0, 3.0)])
+        with self.assertRaises(TypeError):
+            p.points.extend([1.0])
+
+        d = DoubleList()
+        d.doubles.extend(range(6))
+        self.assertEqual(d.doubles[:], [float(i) for i in range(6)])
+
+    def testFromTuples(self):
+        class Track(cypyserialize.SerializableObject):
+            start = Point()
+            end = Point()
+
+        class Tracks(cypyserialize.SerializableObject):
+            tracks = cypyserialize.SerializableArray(Track(), count=cypyserialize.uint())
+
+        t = Tracks(tracks=Tracks.tracks.from_tuples([((0.0, 1.0), (2.0, 3.0)), ((4.0, 5.0), {'y': 7.0, 'x': 6.0})]))
+        self.assertEqual(t.tracks[1].end.x, 6.0)
+        self.assertEqual(t.tracks[1].end.y, 7.0)
+        self.assertEqual(t.tracks.size, 64)
+        self.assertEqual(Tracks(t.pack()).tracks[0].end.y, 3.0)
+
+    def testFromNumpy(self):
+        try:
+            import numpy
+        except ImportError:
+            self.skipTest("numpy is not installed")
+
+        rows = numpy.zeros(3, dtype=Point.numpy_dtype())
+        rows['x'] = [1.0, 2.0, 3.0]
+        p = Path(points=Path.points.from_numpy(rows))
+        self.assertEqual([pt.x for pt in p.points], [1.0, 2.0, 3.0])
+        self.assertEqual(p.points.size, 48)
+
+        d = DoubleList(doubles=DoubleList.doubles.from_numpy(numpy.arange(6)))
+        self.assertEqual(d.doubles[:], [float(i) for i in range(6)])
+
 if __name__ == '__main__':
     unittest.main()